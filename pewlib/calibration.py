@@ -1,6 +1,6 @@
 import numpy as np
 
-from typing import Tuple, Union
+from typing import Generator, Iterable, Tuple, Union
 
 
 def weights_from_weighting(
@@ -38,6 +38,126 @@ def weights_from_weighting(
         raise ValueError(f"Unknown weighting {weighting}.")
 
 
+def _weighted_linreg_moments(
+    x: np.ndarray, y: np.ndarray, w: np.ndarray, n: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Closed form weighted linear regression along the last axis.
+
+    Masked values must have a weight of 0 and finite `x`, `y`.
+    If all `x` are equal the solution and zero error of
+    :func:`numpy.polynomial.polynomial.polyfit` are returned.
+
+    Args:
+        x: array
+        y: array, same shape as `x`
+        w: weights, same shape as `x`
+        n: number of valid points, shape of `x` without last axis
+
+    Returns:
+       gradient
+       intercept
+       r²
+       error
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sw = np.sum(w, axis=-1)
+        mx = np.sum(w * x, axis=-1) / sw
+        my = np.sum(w * y, axis=-1) / sw
+
+        dx = x - mx[..., None]
+        dy = y - my[..., None]
+        sxx = np.sum(w * dx * dx, axis=-1)
+        sxy = np.sum(w * dx * dy, axis=-1)
+        syy = np.sum(w * dy * dy, axis=-1)
+
+        # Polyfit scales each column to unit norm before lstsq, the minimum-norm
+        # solution then splits `my` equally between gradient and intercept
+        degenerate = sxx == 0.0
+        gradient = np.where(
+            degenerate, np.where(mx == 0.0, 0.0, my / (2.0 * mx)), sxy / sxx
+        )
+        intercept = np.where(
+            degenerate, np.where(mx == 0.0, my, my / 2.0), my - gradient * mx
+        )
+
+        rsq = np.clip(sxy * sxy / (sxx * syy), 0.0, 1.0)
+        # From the residuals, syy - gradient * sxy cancels for near perfect fits
+        rss = np.sum(w * (dy - gradient[..., None] * dx) ** 2, axis=-1)
+        # Lstsq returns no residuals for rank-deficient fits
+        error = np.where((n > 2) & ~degenerate, np.sqrt(rss / (n - 2)), 0.0)
+
+    return gradient, intercept, rsq, error
+
+
+def _prepare_batch(
+    points: np.ndarray, weights: np.ndarray = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim != 3 or points.shape[2] != 2:
+        raise ValueError("Points must have shape (sets, points, 2).")
+
+    if weights is None:
+        weights = np.ones(points.shape[:2], dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.shape != points.shape[:2]:
+        raise ValueError("Weights must have shape (sets, points).")
+
+    valid = ~np.logical_or(np.any(np.isnan(points), axis=2), np.isnan(weights))
+    x = np.where(valid, points[:, :, 0], 0.0)
+    y = np.where(valid, points[:, :, 1], 0.0)
+    w = np.where(valid, weights, 0.0)
+    n = np.count_nonzero(valid, axis=1)
+    return x, y, w, n, valid
+
+
+def _empty_batch_defaults(
+    n: np.ndarray,
+    gradient: np.ndarray,
+    intercept: np.ndarray,
+    rsq: np.ndarray,
+    error: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    empty = n == 0
+    gradient[empty], intercept[empty] = 1.0, 0.0
+    rsq[empty], error[empty] = np.nan, np.nan
+    return gradient, intercept, rsq, error
+
+
+def _residual_stats(
+    x: np.ndarray,
+    y: np.ndarray,
+    w: np.ndarray,
+    n: np.ndarray,
+    gradient: np.ndarray,
+    intercept: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """The r² and error of a line, from the weighted residual sum of squares.
+
+    The r² is 1 - RSS / TSS and is NaN if all x are equal.
+    """
+    residuals = y - (gradient[:, None] * x + intercept[:, None])
+    rss = np.sum(w * residuals * residuals, axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sw = np.sum(w, axis=-1)
+        mx = np.sum(w * x, axis=-1) / sw
+        my = np.sum(w * y, axis=-1) / sw
+        sxx = np.sum(w * (x - mx[:, None]) ** 2, axis=-1)
+        tss = np.sum(w * (y - my[:, None]) ** 2, axis=-1)
+        rsq = np.where(sxx == 0.0, np.nan, np.minimum(1.0 - rss / tss, 1.0))
+        error = np.where(n > 2, np.sqrt(rss / (n - 2)), 0.0)
+    return rsq, error
+
+
+def _sorted_nanmedian(x: np.ndarray) -> np.ndarray:
+    """Median along axis 1 ignoring NaN, which are sorted to the end."""
+    x = np.sort(x, axis=1)
+    k = np.count_nonzero(~np.isnan(x), axis=1)
+    lo = np.maximum((k - 1) // 2, 0)[:, None]
+    hi = np.minimum(k // 2, x.shape[1] - 1)[:, None]
+    lo, hi = np.take_along_axis(x, lo, axis=1), np.take_along_axis(x, hi, axis=1)
+    return np.where(k > 0, (lo[:, 0] + hi[:, 0]) / 2.0, np.nan)
+
+
 def weighted_rsq(x: np.ndarray, y: np.ndarray, w: np.ndarray = None) -> float:
     """Calculate r² for weighted linear regression.
 
@@ -46,17 +166,7 @@ def weighted_rsq(x: np.ndarray, y: np.ndarray, w: np.ndarray = None) -> float:
         y: array, same size as `x`
         w: weights, same size as `x`
     """
-    c = np.cov(x, y, aweights=w)
-    d = np.diag(c)
-    stddev = np.sqrt(d.real)
-    c /= stddev[:, None]
-    c /= stddev[None, :]
-
-    np.clip(c.real, -1, 1, out=c.real)
-    if np.iscomplexobj(c):  # pragma: no cover
-        np.clip(c.imag, -1, 1, out=c.imag)
-
-    return c[0, 1] ** 2.0
+    return weighted_linreg(x, y, w)[2]
 
 
 def weighted_linreg(
@@ -64,7 +174,11 @@ def weighted_linreg(
 ) -> Tuple[float, float, float, float]:
     """Weighted linear regression.
 
-    Uses polyfit with sqrt(weights) for intercept and gradient.
+    Gradient, intercept, r² and error are calculated in closed form from
+    the weighted sums of `x` and `y`, minimising sum(w * residuals²).
+    If all `x` are equal then the result of
+    :func:`numpy.polynomial.polynomial.polyfit` is returned, with an error of 0 and
+    an r² of NaN.
 
     Args:
         x: 1d-array
@@ -75,17 +189,269 @@ def weighted_linreg(
        gradient
        intercept
        r²
+       error
+
+    See Also:
+        :func:`pewlib.calibration.weighted_linreg_batch`
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    w = np.ones_like(x) if w is None else np.asarray(w, dtype=np.float64)
+
+    gradient, intercept, rsq, error = _weighted_linreg_moments(x, y, w, x.size)
+    return float(gradient), float(intercept), float(rsq), float(error)
+
+
+def weighted_linreg_batch(
+    points: np.ndarray, weights: np.ndarray = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Weighted linear regression of many sets of points.
+
+    All sets are fit at once using closed form weighted sums.
+    Points containing a NaN, or with a NaN weight, are excluded.
+    Sets without any valid points return a gradient of 1, intercept of 0 and
+    NaN r² and error.
+
+    Args:
+        points: array of (x, y), shape (sets, points, 2)
+        weights: weights, shape (sets, points), defaults to equal
+
+    Returns:
+       gradient
+       intercept
+       r²
+       error
+
+    See Also:
+        :func:`pewlib.calibration.weighted_linreg`
+    """
+    x, y, w, n, valid = _prepare_batch(points, weights)
+    gradient, intercept, rsq, error = _weighted_linreg_moments(x, y, w, n)
+    return _empty_batch_defaults(n, gradient, intercept, rsq, error)
+
+
+def theil_sen_batch(
+    points: np.ndarray, weights: np.ndarray = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Theil-Sen regression of many sets of points.
+
+    The gradient is the median of the slopes between all pairs of points and the
+    intercept the median of y - gradient * x. Slopes are calculated for all sets
+    at once and the medians taken from sorted arrays. Weights are only used for
+    r² and error, which describe the returned line. Sets where all x are equal
+    fall back to least squares.
+
+    Args:
+        points: array of (x, y), shape (sets, points, 2)
+        weights: weights, shape (sets, points), defaults to equal
+
+    Returns:
+       gradient
+       intercept
+       r²
+       error
+
+    See Also:
+        :func:`pewlib.calibration.weighted_linreg_batch`
+
+    References:
+        Sen, P. K. Estimates of the Regression Coefficient Based on Kendall's Tau
+            Journal of the American Statistical Association, 1968, 63, 1379-1389
+    """
+    x, y, w, n, valid = _prepare_batch(points, weights)
+    lsq_gradient, lsq_intercept, _, _ = _weighted_linreg_moments(x, y, w, n)
+
+    i, j = np.triu_indices(x.shape[1], k=1)
+    dx = x[:, j] - x[:, i]
+    pair_valid = np.logical_and.reduce((valid[:, i], valid[:, j], dx != 0.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slopes = np.where(pair_valid, (y[:, j] - y[:, i]) / dx, np.nan)
+
+    gradient = _sorted_nanmedian(slopes)
+    intercept = _sorted_nanmedian(np.where(valid, y - gradient[:, None] * x, np.nan))
+
+    no_pairs = np.isnan(gradient)
+    gradient[no_pairs], intercept[no_pairs] = (
+        lsq_gradient[no_pairs],
+        lsq_intercept[no_pairs],
+    )
+
+    rsq, error = _residual_stats(x, y, w, n, gradient, intercept)
+    return _empty_batch_defaults(n, gradient, intercept, rsq, error)
+
+
+def irls_linreg_batch(
+    points: np.ndarray,
+    weights: np.ndarray = None,
+    loss: str = "huber",
+    max_iter: int = 50,
+    tol: float = 1e-10,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Robust regression of many sets of points using iteratively reweighted
+    least squares.
+
+    Starting from a weighted least squares fit, residuals are scaled by their
+    median absolute deviation and each point is reweighted using the `loss`
+    function. Supported losses are 'huber' (c = 1.345) and Tukey's 'bisquare'
+    (c = 4.685). Robust weights are multiplied by `weights`. All sets are
+    iterated at once until the change in parameters is below `tol`. The r² and
+    error of the final line are calculated using `weights` only.
+
+    Args:
+        points: array of (x, y), shape (sets, points, 2)
+        weights: weights, shape (sets, points), defaults to equal
+        loss: robust loss function {'huber', 'bisquare'}
+        max_iter: maximum number of iterations
+        tol: absolute tolerance for convergence
+
+    Returns:
+       gradient
+       intercept
+       r²
+       error
+
+    See Also:
+        :func:`pewlib.calibration.weighted_linreg_batch`
+    """
+    if loss == "huber":
+        c = 1.345
+    elif loss == "bisquare":
+        c = 4.685
+    else:
+        raise ValueError(f"Unknown loss {loss}.")
+
+    x, y, w, n, valid = _prepare_batch(points, weights)
+    gradient, intercept, _, _ = _weighted_linreg_moments(x, y, w, n)
+
+    for _ in range(max_iter):
+        residuals = np.abs(y - (gradient[:, None] * x + intercept[:, None]))
+        mad = _sorted_nanmedian(np.where(valid, residuals, np.nan))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            u = residuals / (c * mad[:, None] / 0.6745)
+            if loss == "huber":
+                robust = np.where(u <= 1.0, 1.0, 1.0 / u)
+            else:
+                robust = np.where(u < 1.0, (1.0 - u * u) ** 2, 0.0)
+        # Perfect fits have a mad of 0, only points off the line are removed
+        robust = np.where(np.isnan(u), 1.0, robust)
+
+        new_gradient, new_intercept, _, _ = _weighted_linreg_moments(
+            x, y, w * robust, n
+        )
+        converged = np.allclose(
+            new_gradient, gradient, rtol=0.0, atol=tol, equal_nan=True
+        ) and np.allclose(new_intercept, intercept, rtol=0.0, atol=tol, equal_nan=True)
+        gradient, intercept = new_gradient, new_intercept
+        if converged:
+            break
+
+    rsq, error = _residual_stats(x, y, w, n, gradient, intercept)
+    return _empty_batch_defaults(n, gradient, intercept, rsq, error)
+
+
+def fit_batch(
+    points: np.ndarray, weights: np.ndarray = None, fit: str = "Linear"
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Fit many sets of points using the method `fit`.
+
+    Args:
+        points: array of (x, y), shape (sets, points, 2)
+        weights: weights, shape (sets, points), defaults to equal
+        fit: fitting method {'Linear', 'Theil-Sen', 'Huber', 'Bisquare'}
+
+    Returns:
+       gradient
+       intercept
+       r²
+       error
+
+    See Also:
+        :func:`pewlib.calibration.weighted_linreg_batch`
+        :func:`pewlib.calibration.theil_sen_batch`
+        :func:`pewlib.calibration.irls_linreg_batch`
+    """
+    if fit == "Linear":
+        return weighted_linreg_batch(points, weights)
+    elif fit == "Theil-Sen":
+        return theil_sen_batch(points, weights)
+    elif fit == "Huber":
+        return irls_linreg_batch(points, weights, loss="huber")
+    elif fit == "Bisquare":
+        return irls_linreg_batch(points, weights, loss="bisquare")
+    else:
+        raise ValueError(f"Unknown fit {fit}.")
+
+
+def calibrate_stack(
+    data: np.ndarray, calibrations: Iterable["Calibration"], out: np.ndarray = None
+) -> np.ndarray:
+    """Calibrate many channels at once.
+
+    Each channel, the first axis of `data`, is calibrated using the `scale` and
+    `offset` of the corresponding calibration. If `out` is passed then the result
+    is written into it without any temporary arrays, `out` may be `data`.
+
+    Args:
+        data: array of shape (channels, ...)
+        calibrations: one calibration per channel
+        out: output array, same shape as `data`, optional
+
+    Returns:
+        calibrated data, `out` if passed
 
     See Also:
-        :func:`pewlib.calibration.weighted_rsq`
+        :meth:`pewlib.calibration.Calibration.calibrate`
     """
-    coef, stats = np.polynomial.polynomial.polyfit(
-        x, y, 1, w=w if w is None else np.sqrt(w), full=True
+    calibrations = list(calibrations)
+    if len(calibrations) != data.shape[0]:
+        raise ValueError("Number of calibrations must match data.shape[0].")
+
+    shape = (-1,) + (1,) * (data.ndim - 1)
+    scale = np.array([c.scale for c in calibrations], dtype=np.float64).reshape(shape)
+    offset = np.array([c.offset for c in calibrations], dtype=np.float64).reshape(
+        shape
     )
-    r2 = weighted_rsq(x, y, w)
-    error = np.sqrt(np.sum(stats[0]) / (x.size - 2)) if x.size > 2 else 0.0
 
-    return coef[1], coef[0], r2, error
+    out = np.multiply(data, scale, out=out)
+    return np.subtract(out, offset, out=out)
+
+
+def update_linreg_batch(calibrations: Iterable["Calibration"]) -> None:
+    """Update the linear-regression of many calibrations at once.
+
+    Equivalent to calling :meth:`Calibration.update_linreg` on each calibration.
+    Points are padded with NaN to the largest calibration and fit using
+    :func:`pewlib.calibration.fit_batch`, once for each type of `fit`.
+
+    Args:
+        calibrations: calibrations to update
+    """
+    calibrations = list(calibrations)
+    if len(calibrations) == 0:
+        return
+
+    fits = set(c.fit for c in calibrations)
+    if len(fits) > 1:  # Update each type of fit separately
+        for fit in fits:
+            update_linreg_batch(c for c in calibrations if c.fit == fit)
+        return
+
+    size = max(c.points.shape[0] for c in calibrations)
+    points = np.full((len(calibrations), size, 2), np.nan, dtype=np.float64)
+    weights = np.ones((len(calibrations), size), dtype=np.float64)
+    for i, c in enumerate(calibrations):
+        c._cached_weights = None  # Points may have been modified in place
+        if c.points.size > 0:
+            points[i, : c.points.shape[0]] = c.points
+            weights[i, : c.points.shape[0]] = c.weights
+
+    gradient, intercept, rsq, error = fit_batch(points, weights, fits.pop())
+    for i, c in enumerate(calibrations):
+        if np.isnan(error[i]):  # No valid points
+            c.gradient, c.intercept, c.rsq, c.error = 1.0, 0.0, None, None
+        else:
+            c.gradient, c.intercept = float(gradient[i]), float(intercept[i])
+            c.rsq, c.error = float(rsq[i]), float(error[i])
 
 
 class Calibration(object):
@@ -100,10 +466,16 @@ class Calibration(object):
         rsq: r² of line-of-best-fit
         error: error in line-of-best-fit
         points: array of (x, y)
-        weights: weighting string {'Equal', 'x', '1/x', '1/(x^2)'} or
-            name, array of weights for linear-regression, same length as `points`
+        weights: weighting string {'Equal', 'x', '1/x', '1/(x^2)', 'y', '1/y',
+            '1/(y^2)'} or name, array of weights for linear-regression,
+            same length as `points`
+        fit: fitting method {'Linear', 'Theil-Sen', 'Huber', 'Bisquare'}
+
+    See Also:
+        :func:`pewlib.calibration.fit_batch`
     """
 
+    KNOWN_FIT = ["Linear", "Theil-Sen", "Huber", "Bisquare"]
     KNOWN_WEIGHTING = ["Equal", "x", "1/x", "1/(x^2)", "y", "1/y", "1/(y^2)"]
 
     def __init__(
@@ -115,17 +487,23 @@ class Calibration(object):
         error: float = None,
         points: np.ndarray = None,
         weights: Union[str, Tuple[str, np.ndarray]] = "Equal",
+        fit: str = "Linear",
     ):
+        if fit not in Calibration.KNOWN_FIT:
+            raise ValueError(f"Unknown fit {fit}.")
+
         self.intercept = intercept
         self.gradient = gradient
         self.unit = unit
+        self.fit = fit
 
         self.rsq = rsq
         self.error = error
 
         self._points: np.ndarray = np.empty((0, 2), dtype=np.float64)
         self._weights: np.ndarray = np.empty(0, dtype=np.float64)
-        self.weighting: str = ""
+        self._weighting: str = ""
+        self._cached_weights: np.ndarray = None
 
         if points is not None:
             self.points = points
@@ -150,19 +528,41 @@ class Calibration(object):
         if points.ndim != 2:
             raise ValueError("Points must have 2 dimensions.")
         self._points = points
+        self._cached_weights = None
+
+    @property
+    def weighting(self) -> str:
+        return self._weighting
+
+    @weighting.setter
+    def weighting(self, weighting: str) -> None:
+        self._weighting = weighting
+        self._cached_weights = None
 
     @property
     def weights(self) -> np.ndarray:
+        """Weights for linear-regression.
+
+        Known weightings are calculated from `x` or `y` on first access and cached
+        until `points` or `weighting` is set. The cached array is read-only.
+        """
         if self.weighting in Calibration.KNOWN_WEIGHTING:
-            return weights_from_weighting(self.x, self.weighting)
+            if self._cached_weights is None:
+                if "y" in self.weighting:
+                    weights = weights_from_weighting(
+                        self.y, self.weighting.replace("y", "x")
+                    )
+                else:
+                    weights = weights_from_weighting(self.x, self.weighting)
+                weights.flags.writeable = False
+                self._cached_weights = weights
+            return self._cached_weights
         return self._weights
 
     @weights.setter
     def weights(self, weights: Union[str, Tuple[str, np.ndarray]]) -> None:
         if isinstance(weights, str):
             self.weighting = weights
-            # p = self.x if "y" not in weights else self.y
-            # weights = weights.replace("y", "x")
             self._weights = np.empty(0, dtype=np.float64)
         else:
             self.weighting = weights[0]
@@ -177,12 +577,162 @@ class Calibration(object):
             s += f"\nr² = {self.rsq:.4f}"
         return s
 
-    def calibrate(self, data: np.ndarray) -> np.ndarray:
+    @property
+    def scale(self) -> float:
+        """Multiplier for calibration, 1 / gradient."""
+        return 1.0 / self.gradient
+
+    @property
+    def offset(self) -> float:
+        """Subtracted after scaling for calibration, intercept / gradient."""
+        return self.intercept / self.gradient
+
+    def calibrate(self, data: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """Calibrate data.
+
+        Calculated as `data` * `scale` - `offset`, equivalent to
+        (`data` - intercept) / gradient. If `out` is passed then the result is
+        written into it without any temporary arrays, `out` may be `data`.
+
+        Args:
+            data: array
+            out: output array, same shape as `data`, optional
+
+        Returns:
+            calibrated data, `out` if passed
+        """
         if self.intercept == 0.0 and self.gradient == 1.0:
-            return data
-        return (data - self.intercept) / self.gradient
+            if out is None:
+                return data
+            np.copyto(out, data)
+            return out
+        out = np.multiply(data, self.scale, out=out)
+        return np.subtract(out, self.offset, out=out)
+
+    def _uncertainty_coefficients(
+        self, replicates: int
+    ) -> Tuple[float, float, float, float]:
+        """Coefficients (a, b, ȳ, c) of the standard error a * sqrt(b + (y-ȳ)²/c)."""
+        no_nans = ~np.isnan(self.points).any(axis=1)
+        n = np.count_nonzero(no_nans)
+        if n < 3:
+            return np.nan, np.nan, 0.0, 1.0
+
+        x, y, w = self.x[no_nans], self.y[no_nans], self.weights[no_nans]
+        w = w / np.mean(w)
+        residuals = y - (self.gradient * x + self.intercept)
+        s = np.sqrt(np.sum(w * residuals ** 2) / (n - 2))
+        xbar, ybar = np.average(x, weights=w), np.average(y, weights=w)
+        sxx = np.sum(w * (x - xbar) ** 2)
+
+        a = s / np.abs(self.gradient)
+        b = 1.0 / replicates + 1.0 / n
+        c = self.gradient ** 2 * sxx
+        return a, b, ybar, c
+
+    def _calibrate_with_uncertainty_into(
+        self,
+        data: np.ndarray,
+        conc: np.ndarray,
+        stderr: np.ndarray,
+        coefficients: Tuple[float, float, float, float],
+    ) -> None:
+        a, b, ybar, c = coefficients
+        self.calibrate(data, out=conc)
+        err = np.subtract(data, ybar, out=stderr)
+        np.square(err, out=err)
+        np.divide(err, c, out=err)
+        np.add(err, b, out=err)
+        np.sqrt(err, out=err)
+        np.multiply(err, a, out=err)
+
+    def calibrate_with_uncertainty(
+        self,
+        data: np.ndarray,
+        replicates: int = 1,
+        chunk_size: int = None,
+        out: Tuple[np.ndarray, np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Calibrate data and calculate the standard error of each value.
+
+        The standard error of a value predicted from the calibration curve is
+        s / |m| * sqrt(1/k + 1/n + (y - ȳ)² / (m² Sxx)), where `s` is the weighted
+        residual standard deviation, `k` the number of `replicates` and `n` the
+        number of valid points [1]. Weights are normalised to a mean of 1.
+        Standard errors are NaN if there are less than 3 valid points.
+
+        If `chunk_size` is passed then `data` is processed `chunk_size` values of the
+        first axis at a time. Unless `out` is passed, two arrays the size of `data`
+        are allocated in memory; for out-of-core use with :class:`numpy.memmap`
+        either pass memory mapped `out` arrays or use
+        :meth:`pewlib.calibration.Calibration.iter_calibrate_with_uncertainty`.
+
+        Args:
+            data: array
+            replicates: number of measurements averaged for each value
+            chunk_size: size of chunks along axis 0, optional
+            out: output arrays for concentration and error, optional
+
+        Returns:
+            calibrated data
+            standard error of calibrated data
+
+        References:
+            .. [1] Miller, J. N. & Miller, J. C. Statistics and Chemometrics for
+                Analytical Chemistry, Pearson, 2010, 6th ed., 124-127
+        """
+        if out is None:
+            out = (
+                np.empty(data.shape, dtype=np.float64),
+                np.empty(data.shape, dtype=np.float64),
+            )
+        conc, stderr = out
+
+        coefficients = self._uncertainty_coefficients(replicates)
+        if chunk_size is None:
+            chunk_size = max(data.shape[0], 1)
+
+        for i in range(0, data.shape[0], chunk_size):
+            self._calibrate_with_uncertainty_into(
+                data[i : i + chunk_size],
+                conc[i : i + chunk_size],
+                stderr[i : i + chunk_size],
+                coefficients,
+            )
+
+        return conc, stderr
+
+    def iter_calibrate_with_uncertainty(
+        self, data: np.ndarray, replicates: int = 1, chunk_size: int = 1024
+    ) -> Generator[Tuple[slice, np.ndarray, np.ndarray], None, None]:
+        """Calibrate data and calculate the standard error, one chunk at a time.
+
+        As :meth:`pewlib.calibration.Calibration.calibrate_with_uncertainty` but
+        only a single chunk of each output is allocated per iteration.
+
+        Args:
+            data: array, e.g. a :class:`numpy.memmap`
+            replicates: number of measurements averaged for each value
+            chunk_size: size of chunks along axis 0
+
+        Yields:
+            slice of axis 0, calibrated chunk and standard error of the chunk
+        """
+        coefficients = self._uncertainty_coefficients(replicates)
+        for i in range(0, data.shape[0], chunk_size):
+            chunk = data[i : i + chunk_size]
+            conc = np.empty(chunk.shape, dtype=np.float64)
+            stderr = np.empty(chunk.shape, dtype=np.float64)
+            self._calibrate_with_uncertainty_into(chunk, conc, stderr, coefficients)
+            yield slice(i, i + chunk.shape[0]), conc, stderr
 
     def update_linreg(self) -> None:
+        """Update the line-of-best-fit using the current points.
+
+        As points may have been modified in place any cached weights are
+        recalculated.
+        """
+        self._cached_weights = None
         if self.points.size == 0:
             self.gradient, self.intercept, self.rsq, self.error = 1.0, 0.0, None, None
         else:
@@ -194,17 +744,26 @@ class Calibration(object):
                     None,
                     None,
                 )
-            else:
+            elif self.fit == "Linear":
                 x, y, w = self.x[no_nans], self.y[no_nans], self.weights[no_nans]
                 self.gradient, self.intercept, self.rsq, self.error = weighted_linreg(
                     x, y, w
                 )
+            else:
+                gradient, intercept, rsq, error = fit_batch(
+                    self.points[None, no_nans],
+                    self.weights[None, no_nans],
+                    fit=self.fit,
+                )
+                self.gradient, self.intercept = float(gradient[0]), float(intercept[0])
+                self.rsq, self.error = float(rsq[0]), float(error[0])
 
     def to_array(self) -> np.ndarray:
         points = self.points
         unit = np.array(self.unit)
         weights = np.array(self.weights)
         weighting = np.array(self.weighting)
+        fit = np.array(self.fit)
         return np.array(
             (
                 self.intercept,
@@ -215,6 +774,7 @@ class Calibration(object):
                 points,
                 weights,
                 weighting,
+                fit,
             ),
             dtype=[
                 ("intercept", np.float64),
@@ -225,6 +785,7 @@ class Calibration(object):
                 ("points", points.dtype, points.shape),
                 ("weights", weights.dtype, weights.shape),
                 ("weighting", weighting.dtype),
+                ("fit", fit.dtype),
             ],
         )
 
@@ -242,6 +803,7 @@ class Calibration(object):
             error=None if np.isnan(array["error"]) else float(array["error"]),
             points=array["points"],
             weights=weights,
+            fit=str(array["fit"]) if "fit" in array.dtype.names else "Linear",
         )
 
     @classmethod
@@ -250,10 +812,11 @@ class Calibration(object):
         points: np.ndarray,
         unit: str = "",
         weights: Union[str, Tuple[str, np.ndarray]] = "Equal",
+        fit: str = "Linear",
     ) -> "Calibration":
         """Create a :class:`Calibration` from points.
 
         Calulates linear-regression params from `points`."""
-        calibration = cls(points=points, weights=weights, unit=unit)
+        calibration = cls(points=points, weights=weights, unit=unit, fit=fit)
         calibration.update_linreg()
         return calibration
@@ -2,6 +2,7 @@ from . import agilent
 from . import csv
 from . import npz
 from . import perkinelmer
+from . import registry
 from . import textimage
 from . import thermo
 from . import vtk
@@ -1,14 +1,14 @@
 """
 Import of line-by-line PerkinElmer ELAN 'XL' directories.
 """
+from concurrent.futures import ThreadPoolExecutor
 import logging
 
 import numpy as np
-import numpy.lib.recfunctions
 
 from pathlib import Path
 
-from typing import Tuple, Union
+from typing import List, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
@@ -27,12 +27,92 @@ def is_valid_directory(path: Union[str, Path]) -> bool:
     return len(list(path.glob("*.xl"))) > 0
 
 
+def xl_read_header(path: Path) -> List[str]:
+    """Reads the column names of a '.xl' file.
+
+    Names are formatted as per :func:`numpy.genfromtxt`, with whitespace stripped
+    and spaces replaced with '_'.
+
+    Args:
+        path: path to '.xl'
+
+    Returns:
+        list of column names
+    """
+    with path.open("r") as fp:
+        fp.readline()  # Title, 'Intensity Vs Time, ...'
+        header = fp.readline()
+    return [name.strip().replace(" ", "_") for name in header.split(",")]
+
+
+def xl_read_datafiles(
+    datafiles: List[Path], drop_names: List[str] = None, max_workers: int = None
+) -> np.ndarray:
+    """Reads a list of '.xl' files into a single structured array.
+
+    The first file is used to determine the names and number of rows.
+    Each file is parsed in a separate thread with :func:`numpy.loadtxt` and written
+    directly into a preallocated array, columns in `drop_names` are never parsed.
+    All files must have the same number of rows.
+
+    Args:
+        datafiles: list of '.xl' files, one per line
+        drop_names: columns to skip, default = ['Time_in_Seconds']
+        max_workers: maximum number of threads
+
+    Returns:
+        structured array of shape (rows, lines)
+
+    Raises:
+        ValueError: files have different number of rows
+    """
+    if drop_names is None:
+        drop_names = ["Time_in_Seconds"]
+
+    header = xl_read_header(datafiles[0])
+    usecols = [i for i, name in enumerate(header) if name not in drop_names]
+    names = [header[i] for i in usecols]
+
+    def read_xl(datafile: Path) -> np.ndarray:
+        return np.loadtxt(
+            datafile,
+            delimiter=",",
+            skiprows=2,
+            usecols=usecols,
+            dtype=np.float64,
+            ndmin=2,
+        )
+
+    first = read_xl(datafiles[0])
+    # Contiguous (rows, lines, names) buffer, viewed as a structured array
+    buffer = np.empty((first.shape[0], len(datafiles), len(names)), dtype=np.float64)
+    buffer[:, 0] = first
+
+    def read_into(i: int) -> None:
+        line = read_xl(datafiles[i])
+        if line.shape != first.shape:
+            raise ValueError(
+                f"Shape mismatch in '{datafiles[i].name}', "
+                f"expected {first.shape}, got {line.shape}."
+            )
+        buffer[:, i] = line
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(read_into, i) for i in range(1, len(datafiles))]
+    for future in futures:
+        future.result()
+
+    dtype = np.dtype([(name, np.float64) for name in names])
+    return buffer.view(dtype).reshape(buffer.shape[:2])
+
+
 def load(
     path: Union[str, Path], import_parameters: bool = True, full: bool = False
 ) -> Union[np.ndarray, Tuple[np.ndarray, dict]]:
     """Loads PerkinElmer directory.
 
     Searches the directory `path` for '.xl' files and used them to reconstruct data.
+    Files are read in parallel, see :func:`pewlib.io.perkinelmer.xl_read_datafiles`.
     If `import_parameters` and a 'parameters.conf' is used then the scantime,
     speed and spotsize can be imported.
 
@@ -46,7 +126,7 @@ def load(
         dict of params if `full`
 
     See Also:
-        :func:`pewlib.io.perkinelmer.collect_datafiles`
+        :func:`pewlib.io.perkinelmer.xl_read_datafiles`
     """
     param_conversion = {
         "ablation.speed": ("speed", 1e3),
@@ -60,14 +140,7 @@ def load(
         path.glob("*.xl"), key=lambda p: int("".join(filter(str.isdigit, p.stem)))
     )
 
-    data = np.stack(
-        [
-            np.genfromtxt(df, skip_header=1, delimiter=",", names=True, deletechars="")
-            for df in datafiles
-        ],
-        axis=1,
-    )
-    data = numpy.lib.recfunctions.drop_fields(data, "Time_in_Seconds")
+    data = xl_read_datafiles(datafiles, drop_names=["Time_in_Seconds"])
     params: dict = {"origin": (0.0, 0.0)}
 
     if import_parameters:
@@ -0,0 +1,240 @@
+"""
+Automatic format detection for the supported imports.
+Paths are identified using their suffix, directory contents and the first few KB
+of any file, the results of which are cached in a :class:`Probe` and reused
+when loading.
+
+Example
+-------
+
+Loading a directory of mixed instrument outputs.
+
+>>> from pathlib import Path
+>>> from pewlib.io import registry
+>>> probes = [registry.probe(p) for p in Path("exports").iterdir()]
+>>> results = registry.load_many([p for p in probes if p is not None], full=True)
+"""
+from concurrent.futures import ThreadPoolExecutor
+import logging
+from pathlib import Path
+
+from pewlib.io import agilent, csv, npz, perkinelmer, textimage, thermo
+
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+class Probe(object):
+    """The detected format of a path.
+
+    Args:
+        path: probed path
+        format: name of format
+        loader: function used to load `path`
+        kwargs: cached probe results passed to `loader`
+        has_params: `loader` accepts the 'full' keyword
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        format: str,
+        loader: Callable[..., Any],
+        kwargs: dict = None,
+        has_params: bool = True,
+    ):
+        self.path = path
+        self.format = format
+        self.loader = loader
+        self.kwargs = kwargs or {}
+        self.has_params = has_params
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"Probe({self.format}, '{self.path}')"
+
+    def load(self, full: bool = False, **kwargs) -> Any:
+        """Load the probed path.
+
+        Keywords are passed to the loader, overriding any cached values.
+        Formats without parameters return an empty dict if `full`.
+        """
+        kwargs = {**self.kwargs, **kwargs}
+        if not self.has_params:
+            data = self.loader(self.path, **kwargs)
+            return (data, {}) if full else data
+        return self.loader(self.path, full=full, **kwargs)
+
+
+ProbeFunction = Callable[[Path, Optional[str]], Optional[Probe]]
+"""Function taking a path and its decoded header, None for directories."""
+
+
+def probe_agilent(path: Path, header: Optional[str]) -> Optional[Probe]:
+    """Agilent batches are directories ending in '.b'."""
+    if header is None and path.suffix.lower() == ".b":
+        return Probe(path, "agilent", agilent.load)
+    return None
+
+
+def probe_perkinelmer(path: Path, header: Optional[str]) -> Optional[Probe]:
+    """PerkinElmer directories contain '.xl' files."""
+    if header is None and next(path.glob("*.xl"), None) is not None:
+        return Probe(path, "perkinelmer", perkinelmer.load)
+    return None
+
+
+def probe_csv(path: Path, header: Optional[str]) -> Optional[Probe]:
+    """Line-by-line csv directories contain '.csv' files.
+
+    The :class:`pewlib.io.csv.GenericOption` is found using file names only.
+    """
+    if header is None and next(path.glob("*.csv"), None) is not None:
+        return Probe(path, "csv", csv.load, {"option": csv.option_for_path(path)})
+    return None
+
+
+def probe_npz(path: Path, header: Optional[str]) -> Optional[Probe]:
+    """Numpy '.npz' archives."""
+    if header is not None and path.suffix.lower() == ".npz":
+        return Probe(path, "npz", npz.load, has_params=False)
+    return None
+
+
+def probe_thermo(path: Path, header: Optional[str]) -> Optional[Probe]:
+    """Qtegra exports have 'MainRuns' in the first (rows) or third (columns) line."""
+    if header is None or path.suffix.lower() != ".csv":
+        return None
+    lines = header.splitlines()
+    if len(lines) > 0 and "MainRuns" in lines[0]:
+        sample_format = "rows"
+    elif len(lines) > 2 and "MainRuns" in lines[2]:
+        sample_format = "columns"
+    else:
+        return None
+    return Probe(path, "thermo", thermo.load, {"sample_format": sample_format})
+
+
+def probe_textimage(path: Path, header: Optional[str]) -> Optional[Probe]:
+    """Delimited text files, the delimiter is guessed from the header."""
+    if header is None or path.suffix.lower() not in [".csv", ".txt", ".text"]:
+        return None
+    delimiter = textimage.sniff_delimiter(header)
+    if delimiter is None:  # Mixed, let textimage normalise
+        return Probe(path, "textimage", textimage.load, has_params=False)
+    return Probe(
+        path, "textimage", textimage.load, {"delimiter": delimiter}, has_params=False
+    )
+
+
+registered_probes: List[ProbeFunction] = [
+    probe_agilent,
+    probe_perkinelmer,
+    probe_csv,
+    probe_npz,
+    probe_thermo,
+    probe_textimage,
+]
+"""Probes tried by :func:`pewlib.io.registry.probe`, in order."""
+
+
+def register(func: ProbeFunction, index: int = None) -> ProbeFunction:
+    """Add a probe function to the registry.
+
+    Can be used as a decorator.
+
+    Args:
+        func: probe function
+        index: position in registry, default appends
+    """
+    if index is None:
+        registered_probes.append(func)
+    else:
+        registered_probes.insert(index, func)
+    return func
+
+
+def read_header(path: Path, size: int = 4096) -> str:
+    """Reads and decodes the first `size` bytes of a file."""
+    with path.open("rb") as fp:
+        return fp.read(size).decode("utf-8-sig", errors="replace")
+
+
+def probe(path: Union[str, Path], header_size: int = 4096) -> Optional[Probe]:
+    """Detect the format of a path.
+
+    Files are only read once, up to `header_size` bytes.
+    Directories are identified by their name and file listing.
+
+    Args:
+        path: file or directory
+        header_size: maximum bytes read from file
+
+    Returns:
+        :class:`pewlib.io.registry.Probe`, None if unknown
+    """
+    if isinstance(path, str):  # pragma: no cover
+        path = Path(path)
+
+    if path.is_dir():
+        header = None
+    elif path.is_file():
+        header = read_header(path, header_size)
+    else:  # pragma: no cover
+        return None
+
+    for func in registered_probes:
+        result = func(path, header)
+        if result is not None:
+            return result
+    return None
+
+
+def load(path: Union[str, Path, Probe], full: bool = False, **kwargs) -> Any:
+    """Probe and load a path.
+
+    Args:
+        path: file, directory or :class:`pewlib.io.registry.Probe`
+        full: also return params, if supported
+        kwargs: passed to loader
+
+    Raises:
+        ValueError: unknown format
+    """
+    result = path if isinstance(path, Probe) else probe(path)
+    if result is None:
+        raise ValueError(f"Unable to determine format of '{path}'.")
+    return result.load(full=full, **kwargs)
+
+
+def load_many(
+    paths: List[Union[str, Path, Probe]],
+    full: bool = False,
+    max_workers: int = None,
+    raise_errors: bool = False,
+) -> List[Union[Any, Tuple[Any, dict], None]]:
+    """Probe and load many paths concurrently.
+
+    Failures are logged and returned as None unless `raise_errors`.
+
+    Args:
+        paths: files, directories or :class:`pewlib.io.registry.Probe`
+        full: also return params
+        max_workers: maximum number of threads
+        raise_errors: raise the first exception
+
+    Returns:
+        list of results, in the order of `paths`
+    """
+
+    def load_one(path: Union[str, Path, Probe]) -> Any:
+        try:
+            return load(path, full=full)
+        except Exception as e:
+            if raise_errors:
+                raise
+            logger.warning(f"Unable to load '{path}': {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(load_one, paths))
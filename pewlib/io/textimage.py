@@ -2,19 +2,65 @@
 Import and export of text-images, files where data is stored as delimited text values.
 Data is read in order from the first line.
 """
+import io
 import numpy as np
 from pathlib import Path
 
-from typing import Union
+from typing import TextIO, Union
+
+KNOWN_DELIMITERS = [",", ";", "\t"]
+
+
+def sniff_delimiter(sample: str, comments: str = "#") -> Union[str, None]:
+    """Guess the delimiter of a text-image.
+
+    Each known delimiter {',', ';', '\\t'} is searched for in the non-comment
+    lines of `sample`.
+
+    Args:
+        sample: start of text-image
+        comments: comment character
+
+    Returns:
+        delimiter, ',' if none found or None if mixed
+    """
+    lines = [line for line in sample.splitlines() if not line.startswith(comments)]
+    # Last line may be incomplete
+    if len(lines) > 1 and not sample.endswith("\n"):
+        lines = lines[:-1]
+    text = "\n".join(lines)
+
+    found = [d for d in KNOWN_DELIMITERS if d in text]
+    if len(found) == 0:
+        return ","
+    elif len(found) == 1:
+        return found[0]
+    return None
+
+
+def _loadtxt(fp: TextIO, delimiter: str, comments: str) -> np.ndarray:
+    try:
+        return np.loadtxt(
+            fp, delimiter=delimiter, comments=comments, dtype=np.float64, ndmin=2
+        )
+    except ValueError:  # Missing values, fall back to genfromtxt
+        fp.seek(0)
+        return np.genfromtxt(
+            fp, delimiter=delimiter, comments=comments, dtype=np.float64
+        )
 
 
 def load(
-    path: Union[str, Path], delimiter: str = None, comments: str = "#", name: str = None
+    path: Union[str, Path],
+    delimiter: str = None,
+    comments: str = "#",
+    name: str = None,
 ) -> np.ndarray:
     """Load text-image.
 
-    Loads 2d data from file. If `delimiter` is specified then all tab and ';'
-    are converted to ',' before import. If `name` is specified then a single
+    Loads 2d data from file. If `delimiter` is None then the whole file is searched
+    for each known delimiter. If more than one delimiter is found then all tab and
+    ';' are converted to ',' before import. If `name` is specified then a single
     field structured array is returned.
 
     Args:
@@ -22,20 +68,25 @@ def load(
         delimiter: file delimiter
         comments: file comment character
         name: return single `name` field structured array
+
+    See Also:
+        :func:`numpy.loadtxt`
     """
     if isinstance(path, str):  # pragma: no cover
         path = Path(path)
 
     if delimiter is None:
         with path.open("r") as fp:
-            gen = (line.replace(";", ",").replace("\t", ",") for line in fp)
-            data = np.genfromtxt(
-                gen, delimiter=",", comments=comments, dtype=np.float64
-            )
+            text = fp.read()
+        # The delimiter may change part way through a file, search all of it
+        found = [d for d in KNOWN_DELIMITERS if d in text]
+        if len(found) > 1:  # Mixed delimiters, convert all to ','
+            text = text.translate(str.maketrans(";\t", ",,"))
+        delimiter = found[0] if len(found) == 1 else ","
+        data = _loadtxt(io.StringIO(text), delimiter, comments)
     else:
-        data = np.genfromtxt(
-            path, delimiter=delimiter, comments=comments, dtype=np.float64
-        )
+        with path.open("r") as fp:
+            data = _loadtxt(fp, delimiter, comments)
 
     data = np.atleast_2d(data)
 
@@ -44,14 +95,40 @@ def load(
     return data
 
 
-def save(path: Union[str, Path], data: np.ndarray, header: str = "") -> None:
+def save(
+    path: Union[str, Path],
+    data: np.ndarray,
+    header: str = "",
+    precision: int = 18,
+    block_size: int = 2 ** 16,
+) -> None:
     """Save data to csv.
 
-    See :func:`numpy.savetxt`
+    Data is formatted as '%.{precision}g' in blocks of approximately `block_size`
+    values, each block with a single string format operation. A `precision` of 17
+    or more will preserve all float64 values. Output is the same as
+    :func:`numpy.savetxt`.
 
     Args:
         path: path to file
         data: unstructured array
         header: file header
+        precision: number of significant digits
+        block_size: number of values per formatted block
     """
-    np.savetxt(path, data, delimiter=",", comments="#", header=header, fmt="%.18g")
+    if isinstance(path, str):  # pragma: no cover
+        path = Path(path)
+
+    if data.ndim == 1:  # pragma: no cover
+        data = data[:, None]
+
+    rows_per_block = max(1, block_size // max(1, data.shape[1]))
+    fmt = ",".join([f"%.{precision}g"] * data.shape[1]) + "\n"
+
+    with path.open("wb") as fp:
+        if header != "":
+            fp.write(("#" + header.replace("\n", "\n#") + "\n").encode())
+        for i in range(0, data.shape[0], rows_per_block):
+            block = data[i : i + rows_per_block]
+            text = (fmt * block.shape[0]) % tuple(block.ravel().tolist())
+            fp.write(text.encode())
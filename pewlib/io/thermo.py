@@ -213,7 +213,10 @@ def icap_csv_sample_format(path: Union[str, Path]) -> str:
 
 
 def load(
-    path: Union[str, Path], use_analog: bool = False, full: bool = False
+    path: Union[str, Path],
+    use_analog: bool = False,
+    full: bool = False,
+    sample_format: str = None,
 ) -> Union[np.ndarray, Tuple[np.ndarray, dict]]:  # pragma: no cover
     """Imports iCap CSV export.
 
@@ -222,11 +225,14 @@ def load(
     If `use_analog` the 'Analog' channel must be exported.
     If `full` and the 'Time' column is exported then the scantime can be determined.
     Samples in columns and rows are both supported.
+    If `sample_format` is None then it is read using
+    :func:`pewlib.io.thermo.icap_csv_sample_format`.
 
     Args:
         path: path to CSV
         use_analog: ues 'Analog' instead of 'Counts'
         full: also export a dict of params
+        sample_format: 'rows' or 'columns', optional
 
     Returns:
         structured array of data
@@ -238,7 +244,8 @@ def load(
     if isinstance(path, str):  # pragma: no cover
         path = Path(path)
 
-    sample_format = icap_csv_sample_format(path)
+    if sample_format is None:
+        sample_format = icap_csv_sample_format(path)
     if sample_format == "rows":
         data = icap_csv_rows_read_data(path)
         if full:
@@ -174,7 +174,7 @@ class Laser(_Laser):
         if calibrate:
             if isotope is None:  # Perform calibration on all data
                 for name in data.dtype.names:
-                    data[name] = self.calibration[name].calibrate(data[name])
+                    self.calibration[name].calibrate(data[name], out=data[name])
             else:
                 data = self.calibration[isotope].calibrate(data)
 
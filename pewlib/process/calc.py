@@ -1,8 +1,9 @@
 """This module contains functions used by other processing modules."""
 
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 
-from typing import List, Tuple
+from typing import List, Tuple, Union
 
 
 def local_maxima(x: np.ndarray) -> np.ndarray:
@@ -59,6 +60,7 @@ def shuffle_blocks(
     mask: np.ndarray = None,
     mode: str = "pad",
     shuffle_partial: bool = False,
+    rng: np.random.Generator = None,
 ) -> np.ndarray:
     """Shuffle an ndim array as tiles of a certain size.
 
@@ -73,9 +75,13 @@ def shuffle_blocks(
         mask: mask, same shape as `x`, optional
         mode: method, {'pad', 'inplace'}
         shuffle_partial: shuffle partially masked blocks
+        rng: random generator, defaults to the `np.random` global state
 
     Returns:
         new array if pad, view if inplace
+
+    See Also:
+        :func:`pewlib.process.calc.shuffle_blocks_batch`
     """
     shape = x.shape
     if mask is None:  # pragma: no cover
@@ -102,7 +108,8 @@ def shuffle_blocks(
 
     # Create flat index then shuffle
     idx = np.nonzero(mask)
-    nidx = np.random.permutation(np.ravel_multi_index(idx, mask.shape))
+    permutation = np.random.permutation if rng is None else rng.permutation
+    nidx = permutation(np.ravel_multi_index(idx, mask.shape))
     nidx = np.unravel_index(nidx, mask.shape)
     blocks[idx] = blocks[nidx]
 
@@ -112,8 +119,216 @@ def shuffle_blocks(
     return x
 
 
+def gather_blocks(
+    x: np.ndarray, block: Tuple[int, ...], mode: str = "pad"
+) -> np.ndarray:
+    """Copy an array into contiguous, non-overlapping blocks.
+
+    If `mode` is 'pad' then `x` is edge padded to fit the block size, if
+    'inplace' then any partial blocks at the array edges are excluded.
+
+    Args:
+        x: array
+        block: block shape, same dims as `x`
+        mode: method, {'pad', 'inplace'}
+
+    Returns:
+        array of shape (*grid, *block)
+
+    See Also:
+        :func:`pewlib.process.calc.scatter_blocks`
+    """
+    assert len(block) == x.ndim
+    if mode == "pad":
+        pads = [(0, p) for p in (block - (np.array(x.shape) % block)) % block]
+        x = np.pad(x, pads, mode="edge")
+    elif mode == "inplace":
+        x = x[tuple(slice(0, s - s % b) for s, b in zip(x.shape, block))]
+    else:  # pragma: no cover
+        raise ValueError("Mode must be 'pad' or 'inplace'.")
+
+    grid = tuple(s // b for s, b in zip(x.shape, block))
+    shape = tuple(np.ravel(list(zip(grid, block))))
+    order = tuple(range(0, 2 * x.ndim, 2)) + tuple(range(1, 2 * x.ndim, 2))
+    return np.ascontiguousarray(x.reshape(shape).transpose(order))
+
+
+def scatter_blocks(blocks: np.ndarray, ndim: int) -> np.ndarray:
+    """Join blocks into an array, the inverse of `gather_blocks`.
+
+    Leading axes of `blocks` are preserved, the last 2 * `ndim` axes are
+    interpreted as (*grid, *block).
+
+    Args:
+        blocks: array of shape (..., *grid, *block)
+        ndim: number of block dims
+
+    Returns:
+        array of shape (..., *(grid * block))
+    """
+    lead = blocks.ndim - 2 * ndim
+    grid, block = blocks.shape[lead : lead + ndim], blocks.shape[lead + ndim :]
+    order = tuple(range(lead)) + tuple(
+        lead + i + j * ndim for i in range(ndim) for j in range(2)
+    )
+    shape = blocks.shape[:lead] + tuple(g * b for g, b in zip(grid, block))
+    return blocks.transpose(order).reshape(shape)
+
+
+def block_permutations(
+    size: int, n: int, rng: np.random.Generator = None
+) -> np.ndarray:
+    """Generate many permutations of block indices at once.
+
+    Args:
+        size: number of blocks
+        n: number of permutations
+        rng: random generator, default is seeded from the global numpy state
+
+    Returns:
+        array of shape (n, size), each row a permutation of range(size)
+    """
+    if rng is None:  # Respect np.random.seed
+        rng = np.random.default_rng(np.random.randint(2**32, dtype=np.uint32))
+    dtype = np.int32 if size < 2 ** 31 else np.int64
+    indices = np.broadcast_to(np.arange(size, dtype=dtype), (n, size))
+    return rng.permuted(indices, axis=1)
+
+
+def shufflable_blocks(
+    mask: np.ndarray,
+    block: Tuple[int, ...],
+    mode: str = "pad",
+    shuffle_partial: bool = False,
+) -> np.ndarray:
+    """Flat indices of blocks within a mask.
+
+    Args:
+        mask: mask
+        block: block shape, same dims as `mask`
+        mode: method, {'pad', 'inplace'}
+        shuffle_partial: include partially masked blocks
+
+    Returns:
+        indices into the flattened block grid of `gather_blocks`
+    """
+    blocks = gather_blocks(mask.astype(bool), block, mode=mode)
+    axes = tuple(range(mask.ndim, 2 * mask.ndim))
+    valid = np.any(blocks, axis=axes) if shuffle_partial else np.all(blocks, axis=axes)
+    return np.flatnonzero(valid)
+
+
+def shuffle_blocks_batch(
+    x: np.ndarray,
+    block: Tuple[int, ...],
+    n: int,
+    mask: np.ndarray = None,
+    mode: str = "pad",
+    shuffle_partial: bool = False,
+    rng: np.random.Generator = None,
+    images: bool = False,
+) -> Union[Tuple[np.ndarray, np.ndarray], np.ndarray]:
+    """Shuffle an ndim array as tiles of a certain size, many times.
+
+    Blocks and the indices of shufflable blocks are calculated once and `n`
+    independent permutations generated in a single batch. See `shuffle_blocks`
+    for a description of the `mask`, `mode` and `shuffle_partial`.
+
+    The gathered blocks and the permutation of each shuffle are returned, the
+    blocks of shuffle `i` are `blocks.reshape(-1, *block)[perms[i]]` and can be
+    joined using `scatter_blocks`. Blocks that are not shuffled map to
+    themselves. If `images` then the `n` shuffled arrays are returned instead,
+    these require `n` times the memory of `x`.
+
+    Args:
+        x: array
+        block: block shape, same dims as `x`
+        n: number of shuffles
+        mask: mask, same shape as `x`, optional
+        mode: method, {'pad', 'inplace'}
+        shuffle_partial: shuffle partially masked blocks
+        rng: random generator, for reproducibility
+        images: return the shuffled arrays
+
+    Returns:
+        blocks, shape (*grid, *block)
+        permutations of the flat grid, shape (n, blocks)
+        or if `images`, array of shape (n, *x.shape)
+
+    See Also:
+        :func:`pewlib.process.calc.shuffle_blocks`
+        :func:`pewlib.process.calc.scatter_blocks`
+    """
+    if mask is None:
+        mask = np.ones(x.shape, dtype=bool)
+
+    blocks = gather_blocks(x, block, mode=mode)
+    grid = blocks.shape[: x.ndim]
+    idx = shufflable_blocks(mask, block, mode=mode, shuffle_partial=shuffle_partial)
+    size = int(np.prod(grid))
+    perms = block_permutations(idx.size, n, rng=rng)
+    if idx.size < size:  # Blocks that are not shuffled map to themselves
+        dtype = np.int32 if size < 2 ** 31 else np.int64
+        shuffled, perms = perms, np.empty((n, size), dtype=dtype)
+        perms[:] = np.arange(size, dtype=dtype)
+        for i in range(n):
+            perms[i, idx] = idx[shuffled[i]]
+
+    if not images:
+        return blocks, perms
+
+    # Padded blocks past the edge of `x` are written, then cropped
+    flat = blocks.reshape(-1, *block)
+    cells = np.unravel_index(idx, grid)
+    shape = tuple(max(s, g * b) for s, g, b in zip(x.shape, grid, block))
+    out = np.empty((n, *shape), dtype=x.dtype)
+    region = (slice(None),) + tuple(slice(0, s) for s in x.shape)
+    out[region] = x
+    for i in range(n):
+        view_as_blocks(out[i], block)[cells] = flat[perms[i, idx]]
+    return out[region]
+
+
+def repeat_into(
+    out: np.ndarray, x: np.ndarray, repeats: Tuple[int, int], add: bool = False
+) -> None:
+    """Write a 2d array into `out`, with each value repeated as a block.
+
+    Equivalent to `out[:] = np.repeat(np.repeat(x, r0, axis=0), r1, axis=1)` but
+    without any temporary arrays. `out` may be any strided view, such as a layer of
+    a 3d array or a field of a structured array. If `add` then the repeated values
+    are added to `out` instead.
+
+    Args:
+        out: 2d array, shape of `x` * `repeats`
+        x: 2d array
+        repeats: repeats (r0, r1) along each axis
+        add: accumulate into `out`
+
+    Raises:
+        ValueError if shape of `out` is incorrect
+    """
+    r0, r1 = repeats
+    if out.shape != (x.shape[0] * r0, x.shape[1] * r1):  # pragma: no cover
+        raise ValueError(f"Cannot repeat {x.shape} by {repeats} into {out.shape}.")
+    s0, s1 = out.strides
+    view = np.lib.stride_tricks.as_strided(
+        out,
+        shape=(x.shape[0], r0, x.shape[1], r1),
+        strides=(s0 * r0, s0, s1 * r1, s1),
+        writeable=True,
+    )
+    if add:
+        view += x[:, None, :, None]
+    else:
+        view[:] = x[:, None, :, None]
+
+
 def subpixel_offset(
-    x: np.ndarray, offsets: List[Tuple[int, int]], pixelsize: Tuple[int, int]
+    x: np.ndarray,
+    offsets: List[Tuple[int, int]],
+    pixelsize: Tuple[int, int],
+    max_workers: int = 1,
 ) -> np.ndarray:
     """Offsets layers in a 3d array.
 
@@ -121,13 +336,18 @@ def subpixel_offset(
     across axis 2 of `x`. If the first offset is not (0, 0) then it is prepended.
     Given `offsets` of [(0, 0), (1, 1)] and pixelsize of (2, 2) each layer
     will be streched by 2 and every 2nd layer will be shifted by 1 pixel.
+    Layers are written in parallel if `max_workers` is not 1.
 
     Args:
         offsets: pixel offsets in (x, y)
         pixelsize: enlargement (x, y)
+        max_workers: number of threads, None for the default
 
     Returns:
         array
+
+    See Also:
+        :func:`pewlib.process.calc.repeat_into`
     """
     # Offset for first layer must be zero
     if offsets[0] != (0, 0):
@@ -142,20 +362,26 @@ def subpixel_offset(
     # Create empty array to store data in
     data = np.zeros((*new_shape, x.shape[2]), dtype=x.dtype)
 
-    for i in range(0, x.shape[2]):
+    def offset_layer(i: int) -> None:
         # Cycle through offsets
         start = offsets[i % len(offsets)]
         end = -(overlap[0] - start[0]) or None, -(overlap[1] - start[1]) or None
-        # Stretch arrays as required
-        data[start[0] : end[0], start[1] : end[1], i] = np.repeat(
-            x[:, :, i], pixelsize[0], axis=0
-        ).repeat(pixelsize[1], axis=1)
+        # Stretch arrays as required, directly into data
+        region = data[start[0] : end[0], start[1] : end[1], i]
+        repeat_into(region, x[:, :, i], pixelsize)
+
+    if max_workers == 1:
+        for i in range(0, x.shape[2]):
+            offset_layer(i)
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(offset_layer, range(x.shape[2])))
 
     return data
 
 
 def subpixel_offset_equal(
-    x: np.ndarray, offsets: List[int], pixelsize: int
+    x: np.ndarray, offsets: List[int], pixelsize: int, max_workers: int = 1
 ) -> np.ndarray:
     """Offsets layers in a 3d array.
 
@@ -164,6 +390,7 @@ def subpixel_offset_equal(
     Args:
         offsets: pixel offsets in (x, y)
         pixelsize: enlargement (x, y)
+        max_workers: number of threads, None for the default
 
     Returns:
         array
@@ -171,7 +398,9 @@ def subpixel_offset_equal(
     See Also:
         :func:`pewlib.process.calc.subpixel_offset`
     """
-    return subpixel_offset(x, [(o, o) for o in offsets], (pixelsize, pixelsize))
+    return subpixel_offset(
+        x, [(o, o) for o in offsets], (pixelsize, pixelsize), max_workers=max_workers
+    )
 
 
 def view_as_blocks(
@@ -179,7 +408,9 @@ def view_as_blocks(
 ) -> np.ndarray:
     """Block view of array
 
-    Can be overlapping if `step` < `block`.
+    Can be overlapping if `step` < `block`. The view is built from the strides of
+    `x`, so non-contiguous arrays, such as a field of a structured array, are not
+    copied. Writing to overlapping blocks will change multiple values.
 
     Args:
         x: array
@@ -195,7 +426,6 @@ def view_as_blocks(
     assert len(block) == x.ndim
     if step is None:
         step = block
-    x = np.ascontiguousarray(x)
-    shape = tuple((np.array(x.shape) - block) // np.array(step) + 1) + block
-    strides = tuple(x.strides * np.array(step)) + x.strides
+    shape = tuple((np.array(x.shape) - block) // np.array(step) + 1) + tuple(block)
+    strides = tuple(np.array(x.strides) * step) + x.strides
     return np.lib.stride_tricks.as_strided(x, shape=shape, strides=strides)
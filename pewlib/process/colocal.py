@@ -5,9 +5,15 @@ elements. A few ofthe many available algorithms are implemented in this file.
 
 import numpy as np
 
-from pewlib.process.calc import normalise, shuffle_blocks
+from pewlib.laser import Laser
+from pewlib.process.calc import (
+    block_permutations,
+    gather_blocks,
+    normalise,
+    shufflable_blocks,
+)
 
-from typing import Tuple
+from typing import List, Tuple, Union
 
 
 def li_icq(x: np.ndarray, y: np.ndarray) -> float:
@@ -49,6 +55,107 @@ def pearsonr(x: np.ndarray, y: np.ndarray) -> float:
     return (np.mean(x * y) - (np.mean(x) * np.mean(y))) / (np.std(x) * np.std(y))
 
 
+def _centred_blocks(
+    x: np.ndarray, mask: np.ndarray, block: Tuple[int, ...], idx: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Center a stack within `mask` and gather the blocks at `idx`.
+
+    Returns:
+        centered stack, zero outside `mask`
+        sum of squares of each array
+        gathered blocks, shape (idx.size * block size, c)
+    """
+    axes = tuple(range(1, x.ndim))
+    m = mask.astype(np.float64)
+    xc = (x - (np.sum(x * m, axis=axes, keepdims=True) / m.sum())) * m
+    bsize = int(np.prod(block))
+    xb = np.empty((idx.size * bsize, x.shape[0]), dtype=np.float64)
+    for i, a in enumerate(xc):
+        blocks = gather_blocks(a, block, mode="inplace").reshape(-1, bsize)
+        xb[:, i] = blocks[idx].ravel()
+    return xc, np.sum(xc * xc, axis=axes), xb
+
+
+def _shuffled_pearsonr(
+    x: np.ndarray,
+    y: np.ndarray,
+    mask: np.ndarray,
+    block: Tuple[int, ...],
+    shuffle_partial: bool,
+    n: int,
+    rng: np.random.Generator = None,
+    perms: np.ndarray = None,
+    xblocks: Tuple[np.ndarray, np.ndarray, np.ndarray] = None,
+    chunk_size: int = 2 ** 21,
+) -> np.ndarray:
+    """Pearson's r of many `x` and `n` block shuffles of `y`.
+
+    Sums of the unshuffled regions and the blocks of `x` are calculated once.
+    For each batch of permutations the shuffled blocks of `y` are gathered and the
+    sums of products with every `x` calculated as a single matrix product.
+    Blocks are shuffled as in 'inplace' mode of `shuffle_blocks`, edges are not
+    shuffled. Values of `x` are only used within `mask`.
+
+    Args:
+        x: stack of arrays, shape (c, *y.shape)
+        y: array
+        mask: bool mask, same shape as `y`
+        block: block shape
+        shuffle_partial: shuffle partially masked blocks
+        n: number of shuffles
+        rng: random generator
+        perms: precomputed (n, blocks) permutations, optional
+        xblocks: precomputed result of `_centred_blocks` for `x`, optional
+        chunk_size: maximum number of gathered values per batch
+
+    Returns:
+        array of shape (n, c)
+    """
+    m = mask.astype(np.float64)
+    size = m.sum()
+
+    idx = shufflable_blocks(
+        mask, block, mode="inplace", shuffle_partial=shuffle_partial
+    )
+    bsize = int(np.prod(block))
+
+    # Center data within mask, x is zero outside
+    if xblocks is None:
+        xblocks = _centred_blocks(x, mask, block, idx)
+    xc, sxx, xb = xblocks
+    yc = y - np.sum(y * m) / size
+    yb = gather_blocks(yc, block, mode="inplace").reshape(-1, bsize)[idx]
+    mb = gather_blocks(m, block, mode="inplace").reshape(-1, bsize)[idx]
+
+    # Sums outside of the shuffled blocks
+    sxy = np.sum(xc * yc, axis=tuple(range(1, x.ndim))) - yb.ravel() @ xb
+    sy = np.sum(m * yc) - np.sum(mb * yb)
+    syy = np.sum(m * yc * yc) - np.sum(mb * yb * yb)
+    if not shuffle_partial:  # Shuffled blocks are entirely within the mask
+        sy, syy = sy + np.sum(yb), syy + np.sum(yb * yb)
+
+    if perms is None:
+        perms = block_permutations(idx.size, n, rng=rng)
+    rows = max(1, chunk_size // max(yb.size, 1))
+    rs = np.empty((n, x.shape[0]), dtype=np.float64)
+
+    for i in range(0, n, rows):
+        chunk = perms[i : i + rows]
+        yp = yb[chunk].reshape(chunk.shape[0], yb.size)
+        pxy = sxy + yp @ xb
+        if shuffle_partial:
+            py = sy + yp @ mb.ravel()
+            pyy = syy + (yp * yp) @ mb.ravel()
+        else:
+            py, pyy = np.full(yp.shape[0], sy), np.full(yp.shape[0], syy)
+        var_y = pyy / size - (py / size) ** 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs[i : i + rows] = (pxy / size) / np.sqrt(
+                (sxx / size)[None, :] * var_y[:, None]
+            )
+    return rs
+
+
 def pearsonr_probablity(
     x: np.ndarray,
     y: np.ndarray,
@@ -56,6 +163,7 @@ def pearsonr_probablity(
     mask: np.ndarray = None,
     shuffle_partial: bool = False,
     n: int = 500,
+    rng: np.random.Generator = None,
 ) -> Tuple[float, float]:
     """Evalulates Probability of Pearson's coefficient.
 
@@ -65,6 +173,8 @@ def pearsonr_probablity(
     `shuffle_partial` are passed to 'shuffle_blocks'. Implemented as per
     Costes [1].
 
+    All `n` shuffles are evaluated in batches, using sums of each block.
+
     Args:
         x: array
         y: array, same shape as `x`
@@ -72,6 +182,7 @@ def pearsonr_probablity(
         mask: mask for shuffle
         shuffle_partial: shuffle partially masked blocks
         n: number of shuffles to perform
+        rng: random generator, for reproducibility
 
     Returns:
         Pearsons's r
@@ -79,6 +190,7 @@ def pearsonr_probablity(
 
     See Also:
         :func:`pewlib.process.colocal.pearsonr`
+        :func:`pewlib.process.colocal.pearsonr_probability_matrix`
         :func:`pewlib.process.calc.shuffle_blocks`
 
     References:
@@ -89,23 +201,75 @@ def pearsonr_probablity(
     """
     if mask is None:
         mask = np.ones(x.shape, dtype=bool)
+    mask = mask.astype(bool)
 
     r = pearsonr(x[mask], y[mask])
-    rs = np.empty(n, dtype=float)
-    shuffled = y.copy()
-    for i in range(n):
-        shuffled = shuffle_blocks(
-            shuffled,
-            (block, block),
-            mask,
-            mode="inplace",
-            shuffle_partial=shuffle_partial,
-        )
-        rs[i] = pearsonr(x[mask], shuffled[mask])
+    rs = _shuffled_pearsonr(
+        x[None], y, mask, (block, block), shuffle_partial, n, rng=rng
+    )[:, 0]
 
     return r, (rs < r).sum() / n
 
 
+def pearsonr_probability_matrix(
+    x: np.ndarray,
+    block: int = 3,
+    mask: np.ndarray = None,
+    shuffle_partial: bool = False,
+    n: int = 500,
+    rng: np.random.Generator = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Probability of Pearson's coefficient for every pair of a stack.
+
+    As :func:`pewlib.process.colocal.pearsonr_probablity` for each pair of arrays
+    in `x`. The shuffles of each array are compared with every other array at once,
+    the same set of permutations is used for every array.
+
+    Args:
+        x: stack of arrays, shape (c, height, width)
+        block: block size for shuffle
+        mask: mask for shuffle
+        shuffle_partial: shuffle partially masked blocks
+        n: number of shuffles to perform
+        rng: random generator, for reproducibility
+
+    Returns:
+        Pearsons's r, shape (c, c)
+        probability, p, of each r, where p[i, j] shuffles x[j]
+    """
+    if mask is None:
+        mask = np.ones(x.shape[1:], dtype=bool)
+    mask = mask.astype(bool)
+
+    values = x[:, mask]
+    values = values - values.mean(axis=1, keepdims=True)
+    stds = np.sqrt(np.sum(values * values, axis=1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = (values @ values.T) / np.outer(stds, stds)
+
+    # The same permutations are used for each array
+    idx = shufflable_blocks(
+        mask, (block, block), mode="inplace", shuffle_partial=shuffle_partial
+    )
+    perms = block_permutations(idx.size, n, rng=rng)
+    xblocks = _centred_blocks(x, mask, (block, block), idx)
+
+    p = np.empty(r.shape, dtype=np.float64)
+    for j in range(x.shape[0]):
+        rs = _shuffled_pearsonr(
+            x,
+            x[j],
+            mask,
+            (block, block),
+            shuffle_partial,
+            n,
+            perms=perms,
+            xblocks=xblocks,
+        )
+        p[:, j] = (rs < r[:, j]).sum(axis=0) / n
+    return r, p
+
+
 def manders(
     x: np.ndarray, y: np.ndarray, tx: float = None, ty: float = None
 ) -> Tuple[float, float]:
@@ -134,6 +298,97 @@ def manders(
     return np.sum(x, where=y > ty) / x.sum(), np.sum(y, where=x > tx) / y.sum()
 
 
+def colocalisation_matrix(
+    x: Union[np.ndarray, Laser],
+    mask: np.ndarray = None,
+    thresholds: np.ndarray = None,
+    isotopes: List[str] = None,
+    chunk_size: int = 2 ** 20,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Pearson's r, Li's ICQ and Manders' coefficients of every pair of a stack.
+
+    The mean, sum and norm of each array are calculated once, then rows are
+    processed in chunks of about `chunk_size` values, at least one row, with every
+    pair evaluated as a single matrix product. For a :class:`pewlib.laser.Laser`
+    only one chunk of the stacked data is held in memory at a time.
+
+    Manders' M1 and M2 of `x[i]` and `x[j]` are `m[i, j]` and `m[j, i]`.
+
+    Args:
+        x: stack of arrays, shape (c, height, width), or laser
+        mask: only use values within mask, shape (height, width)
+        thresholds: threshold of each array for Manders', defaults to the minimum
+        isotopes: elements of laser to use, default all
+        chunk_size: approximate number of values per chunk
+
+    Returns:
+        Pearson's r, shape (c, c)
+        Li's ICQ, shape (c, c)
+        Manders', fractional overlap of x[i] to x[j], shape (c, c)
+
+    See Also:
+        :func:`pewlib.process.colocal.pearsonr`
+        :func:`pewlib.process.colocal.li_icq`
+        :func:`pewlib.process.colocal.manders`
+    """
+    if isinstance(x, Laser):
+        if isotopes is None:
+            isotopes = x.isotopes
+        arrays = [x.data[name] for name in isotopes]
+    else:
+        arrays = list(x)
+    count = len(arrays)
+    shape = arrays[0].shape
+
+    if mask is not None:
+        mask = np.asarray(mask, dtype=bool)
+        size = int(np.count_nonzero(mask))
+    else:
+        size = int(np.prod(shape))
+    # Chunk by rows, so only the rows of each array in a chunk are copied
+    row_size = int(np.prod(shape[1:]))
+    rows = max(1, chunk_size // max(count * row_size, 1))
+
+    def chunks():
+        for i in range(0, shape[0], rows):
+            if mask is not None:
+                region = mask[i : i + rows]
+                values = [a[i : i + rows][region] for a in arrays]
+            else:
+                values = [a[i : i + rows].ravel() for a in arrays]
+            if values[0].size > 0:
+                yield np.stack(values).astype(np.float64)
+
+    # Per array statistics
+    sums = np.zeros(count, dtype=np.float64)
+    mins = np.full(count, np.inf, dtype=np.float64)
+    for values in chunks():
+        sums += values.sum(axis=1)
+        mins = np.minimum(mins, values.min(axis=1))
+    means = sums / size
+    if thresholds is None:
+        thresholds = mins
+    thresholds = np.asarray(thresholds, dtype=np.float64)[:, None]
+
+    sxy = np.zeros((count, count), dtype=np.float64)
+    opposite = np.zeros((count, count), dtype=np.float64)
+    overlap = np.zeros((count, count), dtype=np.float64)
+    for values in chunks():
+        centered = values - means[:, None]
+        sxy += centered @ centered.T
+        # Products are negative only for opposite signs
+        above = (centered > 0.0).astype(np.float64)
+        opposite += above @ (centered < 0.0).T.astype(np.float64)
+        overlap += values @ (values > thresholds).T.astype(np.float64)
+
+    norms = np.sqrt(np.diag(sxy))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = sxy / np.outer(norms, norms)
+        m = overlap / sums[:, None]
+    icq = (size - opposite - opposite.T) / size - 0.5
+    return r, icq, m
+
+
 def costes_threshold(
     x: np.ndarray, y: np.ndarray, target_r: float = 0.0
 ) -> Tuple[float, float, float]:
@@ -2,11 +2,138 @@
 Care must be taken when using filtering to ensure that legitmate data is not
 also altered.
 """
+from concurrent.futures import ThreadPoolExecutor
+import itertools
 import numpy as np
+import warnings
 
+from pewlib.laser import Laser
 from pewlib.process.calc import view_as_blocks
 
-from typing import Tuple, Union
+from typing import Callable, Iterator, List, Tuple, Union
+
+
+def _window_sum(x: np.ndarray, block: Tuple[int, ...]) -> np.ndarray:
+    """Sum of the `block` sized window centered on each value.
+
+    Windows are truncated at the edges. Calculated by adding shifted slices along
+    each axis in turn, the cost scales with the sum of `block`. Unlike a cumulative
+    sum, each window sum only accumulates rounding error from its own values, large
+    values do not cancel the precision of their distant neighbours.
+
+    Args:
+        x: array, without nan
+        block: odd window size, same dims as `x`
+
+    Returns:
+        window sums, same shape as `x`
+    """
+    for axis, b in enumerate(block):
+        if b == 1:
+            continue
+        pads = [(0, 0)] * x.ndim
+        pads[axis] = (b // 2, b // 2)
+        padded = np.pad(x, pads)
+        window = [slice(None)] * x.ndim
+        window[axis] = slice(0, x.shape[axis])
+        x = padded[tuple(window)].copy()
+        for i in range(1, b):
+            window[axis] = slice(i, i + x.shape[axis])
+            x += padded[tuple(window)]
+    return x
+
+
+def _sorted_nanmedian(values: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """Median of each row of `values`, sorted with `n` non-nan values."""
+    lower, upper = np.maximum((n - 1) // 2, 0), n // 2
+    median = (
+        np.take_along_axis(values, lower[:, None], axis=1)[:, 0]
+        + np.take_along_axis(values, upper[:, None], axis=1)[:, 0]
+    ) / 2.0
+    median[n == 0] = np.nan
+    return median
+
+
+def _median_of_windows(
+    windows: np.ndarray,
+    size: int,
+    out: np.ndarray,
+    chunk_size: int,
+    mad_out: np.ndarray = None,
+) -> None:
+    """Store the nan median of each window in `out`.
+
+    If `mad_out` is given then the median absolute deviation of each window, from
+    its median, is also stored. Windows are chunked along the first axis, or
+    recursively along the next axes if a single row would exceed `chunk_size`
+    values.
+    """
+    row_size = size * int(np.prod(out.shape[1:]))
+    if row_size > chunk_size and out.ndim > 1:
+        for i in range(out.shape[0]):
+            _median_of_windows(
+                windows[i],
+                size,
+                out[i],
+                chunk_size,
+                mad_out[i] if mad_out is not None else None,
+            )
+        return
+
+    rows = max(1, chunk_size // row_size)
+    for i in range(0, out.shape[0], rows):
+        chunk = windows[i : i + rows]
+        values = np.empty((chunk.size // size, size), dtype=np.float64)
+        np.copyto(values.reshape(chunk.shape), chunk)
+
+        # Nan are sorted to the end of each window
+        values.sort(axis=1)
+        n = size - np.count_nonzero(np.isnan(values), axis=1)
+        median = _sorted_nanmedian(values, n)
+        out[i : i + rows] = median.reshape(chunk.shape[: out.ndim])
+
+        if mad_out is not None:
+            values = np.abs(values - median[:, None], out=values)
+            values.sort(axis=1)
+            mad = _sorted_nanmedian(values, n)
+            mad_out[i : i + rows] = mad.reshape(chunk.shape[: out.ndim])
+
+
+def _window_nanmedian(
+    x: np.ndarray,
+    block: Tuple[int, ...],
+    chunk_size: int = 2 ** 22,
+    mad: bool = False,
+) -> Union[np.ndarray, Tuple[np.ndarray, np.ndarray]]:
+    """Median of the `block` sized window centered on each value, ignoring nan.
+
+    Windows are truncated at the edges. Windows are copied and sorted in chunks of
+    approximately `chunk_size` values, so memory use is independent of `x`.
+    Nan are sorted to the end of each window and the middle of the remaining
+    values taken.
+
+    Args:
+        x: array
+        block: odd window size, same dims as `x`
+        chunk_size: maximum number of window values copied at once
+        mad: also return the median absolute deviation of each window
+
+    Returns:
+        window medians, nan if all values in window are nan
+        window median absolute deviations, if `mad`
+    """
+    pads = [(b // 2, b // 2) for b in block]
+    x_pad = np.pad(x, pads, constant_values=np.nan)
+    windows = view_as_blocks(x_pad, block, tuple([1 for b in block]))
+
+    medians = np.empty(x.shape, dtype=np.float64)
+    if not mad:
+        _median_of_windows(windows, int(np.prod(block)), medians, chunk_size)
+        return medians
+
+    mads = np.empty(x.shape, dtype=np.float64)
+    _median_of_windows(windows, int(np.prod(block)), medians, chunk_size, mads)
+    return medians, mads
 
 
 def rolling_mean(
@@ -18,6 +145,10 @@ def rolling_mean(
     If it is `threshold` times the standard deviation *without the central value* then
     it is considered an outlier. This prevents the value from impacting the stddev.
     The mean of each block is recalculated outliers set to the new local mean.
+    NaN values are ignored.
+
+    Means and stddevs are calculated from separable window sums, time scales with
+    the sum of the `block` dims rather than their product.
 
     Args:
         x: array
@@ -58,29 +189,39 @@ def rolling_mean(
         block = tuple([block])
     assert len(block) == x.ndim
 
-    # Prepare array by padding with nan
-    pads = [(b // 2, b // 2) for b in block]
-    x_pad = np.pad(x, pads, constant_values=np.nan)
-
-    blocks = view_as_blocks(x_pad, block, tuple([1 for b in block]))
-
-    # Calculate means and stds
-    axes = tuple(np.arange(x.ndim, x.ndim * 2))
-    means = np.nanmean(blocks, axis=axes)
-
-    # Don't include the central point in the std calculation
-    nancenter = np.ones(block, dtype=np.float64)
-    nancenter[np.array(nancenter.shape) // 2] = np.nan
-    stds = np.nanstd(blocks * nancenter, axis=axes)
-
-    # Check for outlying values and set as nan
-    outliers = np.abs(x - means) > threshold * stds
-
-    unpads = tuple([slice(p[0], -p[1]) for p in pads])
-    x_pad[unpads][outliers] = np.nan
-
-    # As the mean is sensitive to outliers reclaculate it
-    means = np.nanmean(blocks, axis=axes)
+    x = np.asarray(x, dtype=np.float64)
+    valid = ~np.isnan(x)
+    # Shift data to reduce cancellation in the sums of squares, the median is not
+    # pulled away from the bulk of the data by large spikes
+    # Axes with a block size of 1, e.g. channels, are shifted independently
+    axes = tuple(i for i, b in enumerate(block) if b > 1)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        shift = np.nanmedian(x, axis=axes, keepdims=True)
+    shift = np.where(np.isnan(shift), 0.0, shift)
+    xs = np.where(valid, x - shift, 0.0)
+
+    # Calculate means and stds from window sums
+    counts = _window_sum(valid.astype(np.float64), block)
+    sums = _window_sum(xs, block)
+    sumsqs = _window_sum(xs * xs, block)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = sums / counts + shift
+
+        # Don't include the central point in the std calculation
+        n = counts - valid
+        mean_nc = (sums - xs) / n
+        var_nc = (sumsqs - xs * xs) / n - mean_nc * mean_nc
+        stds = np.sqrt(np.maximum(var_nc, 0.0))
+
+        # Check for outlying values
+        outliers = np.abs(x - means) > threshold * stds
+
+        # As the mean is sensitive to outliers reclaculate it without them
+        counts -= _window_sum(outliers.astype(np.float64), block)
+        sums -= _window_sum(np.where(outliers, xs, 0.0), block)
+        means = sums / counts + shift
 
     return np.where(np.logical_and(outliers, ~np.isnan(means)), means, x)
 
@@ -94,6 +235,9 @@ def rolling_median(
     If it is `threshold` times the median distance from the median then
     it is considered an outlier.
     The mean of each block is recalculated outliers set to the local median.
+    NaN values are ignored.
+
+    Windows are sorted in chunks, memory use is independent of the size of `x`.
 
     Args:
         x: array
@@ -135,24 +279,281 @@ def rolling_median(
         block = tuple([block])
     assert len(block) == x.ndim
 
-    # Prepare array by padding with nan
-    pads = [(b // 2, b // 2) for b in block]
-    x_pad = np.pad(x, pads, constant_values=np.nan)
-
-    blocks = view_as_blocks(x_pad, block, tuple([1 for b in block]))
+    x = np.asarray(x, dtype=np.float64)
 
     # Calculate median and differences
-    axes = tuple(np.arange(x.ndim, x.ndim * 2))
-    medians = np.nanmedian(blocks, axis=axes)
-
-    # Remove padding
-    unpads = tuple([slice(p[0], -p[1]) for p in pads])
-    x_pad[unpads] = np.abs(x - medians)
+    medians = _window_nanmedian(x, block)
+    diffs = np.abs(x - medians)
 
     # Median of differences
-    median_medians = np.nanmedian(blocks, axis=axes)
+    median_medians = _window_nanmedian(diffs, block)
 
     # Outliers are n medians from data
-    outliers = np.abs(x - medians) > threshold * median_medians
+    with np.errstate(invalid="ignore"):
+        outliers = diffs > threshold * median_medians
+
+    return np.where(np.logical_and(outliers, ~np.isnan(medians)), medians, x)
+
+
+def rolling_hampel(
+    x: np.ndarray, block: Union[int, Tuple[int, ...]], threshold: float = 3.0
+) -> np.ndarray:
+    """Filter an array using a Hampel filter.
+
+    Each value of `x` is compared to the median of its `block`. If it is more than
+    `threshold` times the scaled median absolute deviation (MAD) of the block from
+    the median then it is considered an outlier and set to the local median.
+    The MAD is scaled by 1.4826, making it consistent with the stddev of normally
+    distributed data. NaN values are ignored.
+
+    Unlike :func:`pewlib.process.filters.rolling_median`, the deviations are taken
+    from the median of each block, not the median at each value.
+
+    Args:
+        x: array
+        block: size of window, int or same dims as `x`
+        threshold: number of scaled MADs away from median to consider outlier
+
+    Returns:
+        array with outliers set to local medians
+    """
+    if isinstance(block, int):
+        block = tuple([block])
+    assert len(block) == x.ndim
+
+    x = np.asarray(x, dtype=np.float64)
+    medians, mads = _window_nanmedian(x, block, mad=True)
+
+    with np.errstate(invalid="ignore"):
+        outliers = np.abs(x - medians) > threshold * 1.4826 * mads
 
     return np.where(np.logical_and(outliers, ~np.isnan(medians)), medians, x)
+
+
+def rolling_poisson(
+    x: np.ndarray, block: Union[int, Tuple[int, ...]], threshold: float = 3.0
+) -> np.ndarray:
+    """Filter count data using a Poisson threshold.
+
+    The mean of each `block`, *without the central value*, is used as the expected
+    counts λ. Values greater than λ + `threshold` * sqrt(λ) are considered spikes
+    and set to λ. To prevent single counts in sparse data being removed, λ is
+    limited to at least 1 when calculating the limit. NaN values are ignored.
+
+    Means are calculated from separable window sums, time scales with the sum of the
+    `block` dims rather than their product.
+
+    Args:
+        x: array of counts
+        block: size of window, int or same dims as `x`
+        threshold: number of Poisson stddevs above mean to consider outlier
+
+    Returns:
+        array with outliers set to local means
+    """
+    if isinstance(block, int):
+        block = tuple([block])
+    assert len(block) == x.ndim
+
+    x = np.asarray(x, dtype=np.float64)
+    valid = ~np.isnan(x)
+    xs = np.where(valid, x, 0.0)
+
+    counts = _window_sum(valid.astype(np.float64), block) - valid
+    sums = _window_sum(xs, block) - xs
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = sums / counts
+        limit = means + threshold * np.sqrt(np.maximum(means, 1.0))
+        outliers = x > limit
+
+    return np.where(np.logical_and(outliers, ~np.isnan(means)), means, x)
+
+
+def despike_lines(
+    x: np.ndarray,
+    size: int = 5,
+    threshold: float = 3.0,
+    axis: int = 1,
+    filter: Callable[..., np.ndarray] = rolling_hampel,
+) -> np.ndarray:
+    """Remove spikes from each line of an image.
+
+    Applies `filter` using a window of `size` values along `axis` only, the
+    direction of the laser scan, so that lines are filtered independently.
+
+    Args:
+        x: array
+        size: number of values in window
+        threshold: passed to `filter`
+        axis: scan axis, lines are rows of :class:`pewlib.laser.Laser` data
+        filter: function taking an array and block, e.g. `rolling_hampel`
+
+    Returns:
+        despiked array
+    """
+    block = [1] * x.ndim
+    block[axis] = size
+    return filter(x, tuple(block), threshold=threshold)
+
+
+def _tiles(
+    shape: Tuple[int, ...], tile_shape: Tuple[int, ...], halo: Tuple[int, ...]
+) -> Iterator[Tuple[Tuple[slice, ...], Tuple[slice, ...], Tuple[slice, ...]]]:
+    """Yields the input, output and local output slices of each tile."""
+    ranges = [range(0, n, t) for n, t in zip(shape, tile_shape)]
+    for starts in itertools.product(*ranges):
+        inputs, outputs, local = [], [], []
+        for start, n, t, h in zip(starts, shape, tile_shape, halo):
+            end = min(start + t, n)
+            lower = max(start - h, 0)
+            inputs.append(slice(lower, min(end + h, n)))
+            outputs.append(slice(start, end))
+            local.append(slice(start - lower, end - lower))
+        yield tuple(inputs), tuple(outputs), tuple(local)
+
+
+def _tiled_tasks(
+    x: np.ndarray,
+    out: np.ndarray,
+    filter: Callable[..., np.ndarray],
+    block: Tuple[int, ...],
+    tile_shape: Union[int, Tuple[int, ...]],
+    halo: Tuple[int, ...],
+    **kwargs,
+) -> List[Callable[[], None]]:
+    """Functions that each filter one tile of `x` into `out`."""
+    if isinstance(tile_shape, int):
+        tile_shape = tuple([tile_shape] * x.ndim)
+
+    def task(inputs: Tuple[slice, ...], outputs, local) -> Callable[[], None]:
+        def run() -> None:
+            out[outputs] = filter(x[inputs], block, **kwargs)[local]
+
+        return run
+
+    return [task(*slices) for slices in _tiles(x.shape, tile_shape, halo)]
+
+
+def _run_tasks(tasks: List[Callable[[], None]], max_workers: int = None) -> None:
+    if max_workers == 1 or len(tasks) == 1:
+        for task in tasks:
+            task()
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for future in [executor.submit(task) for task in tasks]:
+                future.result()
+
+
+def filter_tiled(
+    x: np.ndarray,
+    filter: Callable[..., np.ndarray],
+    block: Union[int, Tuple[int, ...]],
+    tile_shape: Union[int, Tuple[int, ...]] = 256,
+    halo: Tuple[int, ...] = None,
+    max_workers: int = None,
+    out: np.ndarray = None,
+    **kwargs,
+) -> np.ndarray:
+    """Apply a filter to overlapping tiles of an array.
+
+    Each tile is extended by `halo` values on each side, filtered and the
+    central region written to `out`. Tiles are filtered in parallel using a thread
+    pool and memory use is limited to that of the tiles being processed.
+    As window statistics are truncated at the edges of the array, the result is
+    the same as filtering the whole of `x`.
+
+    The default `halo` of twice `block` // 2 covers filters that use two passes
+    of window statistics, such as :func:`pewlib.process.filters.rolling_mean`.
+
+    Args:
+        x: array
+        filter: function taking an array and `block`, e.g. `rolling_median`
+        block: size of window, int or same dims as `x`
+        tile_shape: shape of tiles, int or same dims as `x`
+        halo: tile overlap, default 2 * (`block` // 2)
+        max_workers: number of threads, None for the default
+        out: array to store results, may be `x`
+        kwargs: passed to `filter`
+
+    Returns:
+        filtered array
+
+    Example
+    -------
+
+    >>> import numpy as np
+    >>> from pewlib.process import filters
+    >>> a = np.random.random((2000, 2000))
+    >>> b = filters.filter_tiled(a, filters.rolling_median, (5, 5), threshold=3.0)
+    """
+    if isinstance(block, int):
+        block = tuple([block])
+    assert len(block) == x.ndim
+    if halo is None:
+        halo = tuple(2 * (b // 2) for b in block)
+
+    if out is None:
+        out = np.empty(x.shape, dtype=np.float64)
+    elif np.shares_memory(x, out):  # Tiles must read unfiltered data
+        x = x.copy()
+
+    tasks = _tiled_tasks(x, out, filter, block, tile_shape, halo, **kwargs)
+    _run_tasks(tasks, max_workers=max_workers)
+    return out
+
+
+def filter_channels(
+    x: Union[np.ndarray, Laser],
+    filter: Callable[..., np.ndarray],
+    block: Tuple[int, int],
+    isotopes: List[str] = None,
+    tile_shape: Union[int, Tuple[int, int]] = 256,
+    max_workers: int = None,
+    **kwargs,
+) -> None:
+    """Apply a filter to many channels at once, in place.
+
+    The channels of `x` are filtered in a single vectorised pass, using a window of
+    (1, *block*) over the stacked (channels, height, width) data, so padding and
+    window calculations are shared between channels. Work is split into tiles of
+    all channels and run in parallel.
+
+    Args:
+        x: (channels, height, width) float array or laser
+        filter: function taking an array and `block`, e.g. `rolling_median`
+        block: size of window
+        isotopes: elements of laser to filter, default all
+        tile_shape: shape of tiles, excluding channels
+        max_workers: number of threads, None for the default
+        kwargs: passed to `filter`
+
+    See Also:
+        :func:`pewlib.process.filters.filter_tiled`
+    """
+    if isinstance(tile_shape, int):
+        tile_shape = (tile_shape, tile_shape)
+
+    if isinstance(x, Laser):
+        if isotopes is None:
+            isotopes = x.isotopes
+        data = np.array([x.data[name] for name in isotopes], dtype=np.float64)
+        out = None  # Data is already a copy
+    else:
+        assert x.ndim == 3
+        data, out = x, x
+
+    out = filter_tiled(
+        data,
+        filter,
+        (1, *block),
+        tile_shape=(data.shape[0], *tile_shape),
+        halo=(0, *[2 * (b // 2) for b in block]),
+        max_workers=max_workers,
+        out=out,
+        **kwargs,
+    )
+
+    if isinstance(x, Laser):
+        for name, channel in zip(isotopes, out):
+            x.data[name] = channel
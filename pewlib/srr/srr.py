@@ -9,26 +9,59 @@ References:
     & Doble, P. A. Super-Resolution Reconstruction for Two- and Three-Dimensional
     LA-ICP-MS Bioimaging Analytical Chemistry, American Chemical Society (ACS), 2019
 """
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import numpy.lib.recfunctions as rfn
 from pathlib import Path
 import copy
 
 from pewlib.laser import _Laser, Laser
 from pewlib.calibration import Calibration
 
-from pewlib.process.calc import subpixel_offset_equal
+from pewlib.process.calc import repeat_into
 
 from pewlib.srr.config import SRRConfig
 
-from typing import Dict, List, Tuple, Union
+from typing import Dict, Generator, List, Tuple, Union
+
+
+class _SRRLayers(Sequence):
+    """Read-only sequence of the structured layers of an SRR laser.
+
+    Each layer is created when indexed, using
+    :meth:`pewlib.srr.SRRLaser.layer_data`.
+    """
+
+    def __init__(self, laser: "SRRLaser"):
+        self._laser = laser
+
+    def __len__(self) -> int:
+        return self._laser.layers
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[np.ndarray, List[np.ndarray]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if not -len(self) <= index < len(self):
+            raise IndexError("Layer index out of range.")
+        return self._laser.layer_data(index % len(self))
 
 
 class SRRLaser(_Laser):
     """Class for SRR laser data.
 
+    Data is stored per element, as two contiguous (layers, height, width) stacks,
+    one for the even (horizontal) and one for the odd (vertical) layers. Adding,
+    removing or renaming an element only touches that element's stacks. The
+    structured layers in :attr:`data` are read-only and only created when indexed.
+
+    Reconstructed isotopes, and their flattened images, are cached until the config
+    or data is changed.
+
     Args:
-        data: list of structured arrays
+        data: list of structured arrays, or dict mapping elements to stacks of
+            (even, odd) layers
         calibration: dict mapping elements to calibrations, optional
         config: SRR laser parameters
         name: name of image
@@ -40,14 +73,21 @@ class SRRLaser(_Laser):
 
     def __init__(
         self,
-        data: List[np.ndarray],
+        data: Union[List[np.ndarray], Dict[str, Tuple[np.ndarray, np.ndarray]]],
         calibration: Dict[str, Calibration] = None,
         config: SRRConfig = None,
         name: str = "",
         path: Path = None,
     ):
-        assert len(data) > 1
-        self.data: List[np.ndarray] = data
+        self._cache: Dict[str, np.ndarray] = {}
+        self._flat_cache: Dict[str, np.ndarray] = {}
+        self._cache_key: tuple = ()
+        self._extent: Tuple[float, float, float, float] = None
+
+        if isinstance(data, dict):
+            self._set_channels(data)
+        else:
+            self.data = data
         self.calibration = {name: Calibration() for name in self.isotopes}
         if calibration is not None:
             self.calibration.update(copy.deepcopy(calibration))
@@ -59,45 +99,112 @@ class SRRLaser(_Laser):
         self.name = name
         self.path = path or Path()
 
+    @property
+    def data(self) -> _SRRLayers:
+        """Sequence of read-only structured layers.
+
+        A layer is created each time it is indexed. To modify data set a new list,
+        or use :meth:`pewlib.srr.SRRLaser.add`.
+        """
+        return _SRRLayers(self)
+
+    @data.setter
+    def data(self, data: List[np.ndarray]) -> None:
+        assert len(data) > 1
+        channels = {
+            name: (
+                np.stack([layer[name] for layer in data[0::2]]),
+                np.stack([layer[name] for layer in data[1::2]]),
+            )
+            for name in data[0].dtype.names
+        }
+        self._set_channels(channels)
+
+    def layer_data(self, layer: int) -> np.ndarray:
+        """Read-only structured array of a single layer.
+
+        Unlike :meth:`pewlib.srr.SRRLaser.get` vertical layers are not transposed.
+
+        Args:
+            layer: index of layer
+        """
+        data = self._structured_layer(layer)
+        data.flags.writeable = False
+        return data
+
+    def _set_channels(self, channels: Dict[str, Tuple[np.ndarray, np.ndarray]]):
+        """Set the stored data, clearing the cache."""
+        assert len(channels) > 0
+        stacks = next(iter(channels.values()))
+        assert stacks[0].shape[0] > 0 and stacks[1].shape[0] > 0
+        assert stacks[0].shape[0] - stacks[1].shape[0] in [0, 1]
+        for even, odd in channels.values():
+            assert even.shape == stacks[0].shape and odd.shape == stacks[1].shape
+        self._channels = channels
+        self._layers = stacks[0].shape[0] + stacks[1].shape[0]
+        self.clear_cache()
+
+    def _layer(self, layer: int, isotope: str) -> np.ndarray:
+        """View of a single element of a layer."""
+        return self._channels[isotope][layer % 2][layer // 2]
+
+    def _layers_of(self, isotope: str) -> List[np.ndarray]:
+        """Views of each layer of a single element."""
+        return [self._layer(i, isotope) for i in range(self.layers)]
+
+    @property
+    def _dtype(self) -> np.dtype:
+        """Structured dtype of a layer."""
+        names = self.isotopes
+        return np.dtype([(name, self._channels[name][0].dtype) for name in names])
+
+    def _structured_layer(self, layer: int) -> np.ndarray:
+        """New structured array of a layer."""
+        shape = self._channels[self.isotopes[0]][layer % 2].shape[1:]
+        data = np.empty(shape, dtype=self._dtype)
+        for name in self.isotopes:
+            data[name] = self._layer(layer, name)
+        return data
+
     @property
     def extent(self) -> Tuple[float, float, float, float]:
         """Data extent in μm
 
         This is calculated *post* SRR.
         """
-        pixelsize = self.config.subpixels_per_pixel
-        offset = np.max(self.config._subpixel_offsets)
-        new_shape = np.array(self.shape[:2]) * self.config.magnification
-        new_shape = new_shape * pixelsize + offset
-        return self.config.data_extent(new_shape)
+        self._validate_cache()
+        if self._extent is None:
+            pixelsize = self.config.subpixels_per_pixel
+            offset = np.max(self.config._subpixel_offsets)
+            new_shape = np.array(self.shape[:2]) * self.config.magnification
+            new_shape = new_shape * pixelsize + offset
+            self._extent = self.config.data_extent(new_shape)
+        return self._extent
 
     @property
     def isotopes(self) -> Tuple[str, ...]:
-        return self.data[0].dtype.names
+        return tuple(self._channels.keys())
 
     @property
     def layers(self) -> int:
-        return len(self.data)
+        return self._layers
 
     @property
     def shape(self) -> Tuple[int, ...]:
-        return (self.data[1].shape[0], self.data[0].shape[0], len(self.data))
+        even, odd = self._channels[self.isotopes[0]]
+        return (odd.shape[1], even.shape[1], self.layers)
 
     def add(
         self, isotope: str, data: List[np.ndarray], calibration: Calibration = None
     ) -> None:
         """Add an element."""
-        assert len(data) == len(self.data)
-        for i in range(0, len(self.data)):
-            assert data[i].shape == self.data[i].shape
-            dtype = self.data[i].dtype
-            new_dtype = dtype.descr + [(isotope, data[i].dtype.str)]
-
-            new_data = np.empty(self.data[i].shape, dtype=new_dtype)
-            for name in dtype.names:
-                new_data[name] = self.data[i][name]
-            new_data[isotope] = data[i]
-            self.data[i] = new_data
+        assert len(data) == self.layers
+        even, odd = np.stack(data[0::2]), np.stack(data[1::2])
+        stacks = self._channels[self.isotopes[0]]
+        assert even.shape == stacks[0].shape and odd.shape == stacks[1].shape
+        self._channels[isotope] = (even, odd)
+        self._cache.pop(isotope, None)
+        self._flat_cache.pop(isotope, None)
 
         if calibration is None:
             calibration = Calibration()
@@ -107,10 +214,11 @@ class SRRLaser(_Laser):
         """Remove element(s)."""
         if isinstance(names, str):
             names = [names]
-        for i in range(len(self.data)):
-            self.data[i] = rfn.drop_fields(self.data[i], names, usemask=False)
         for name in names:
+            self._channels.pop(name)
             self.calibration.pop(name)
+            self._cache.pop(name, None)
+            self._flat_cache.pop(name, None)
 
     def rename(self, names: Dict[str, str]) -> None:
         """Rename element(s).
@@ -118,10 +226,32 @@ class SRRLaser(_Laser):
         Args:
             names: dict mapping old to new name
         """
-        for i in range(len(self.data)):
-            self.data[i] = rfn.rename_fields(self.data[i], names)
+        self._channels = {names.get(k, k): v for k, v in self._channels.items()}
         for old, new in names.items():
             self.calibration[(new)] = self.calibration.pop(old)
+        self._cache = {names.get(k, k): v for k, v in self._cache.items()}
+        self._flat_cache = {names.get(k, k): v for k, v in self._flat_cache.items()}
+
+    def clear_cache(self) -> None:
+        """Clear all cached reconstructions."""
+        self._cache = {}
+        self._flat_cache = {}
+        self._extent = None
+
+    def _validate_cache(self) -> None:
+        """Clears the cache if the config has changed."""
+        config = self.config
+        key = (
+            config.spotsize,
+            config.speed,
+            config.scantime,
+            int(config._warmup),
+            int(config._subpixel_size),
+            tuple(config._subpixel_offsets),
+        )
+        if key != self._cache_key:
+            self.clear_cache()
+            self._cache_key = key
 
     def get(
         self,
@@ -151,14 +281,23 @@ class SRRLaser(_Laser):
             2d if layer or flat, else 3d
         """
         if layer is not None:
-            data = self.data[layer].copy()
+            if isotope is not None:
+                data = self._layer(layer, isotope).copy()
+            else:
+                data = self._structured_layer(layer)
             # Flip alternate layers
             if layer % 2 == 1:
                 data = data.T
+        elif flat and isotope is not None:
+            data = self._krisskross_flat_isotope(isotope)
+        elif flat:  # Flatten during SRR
+            data = self.krisskross_flat()
+        elif isotope is not None:
+            data = self._krisskross_isotope(isotope)
         else:
             data = self.krisskross()
 
-        if isotope is not None:
+        if isotope is not None and data.dtype.names is not None:
             data = data[isotope]
 
         if extent is not None:
@@ -176,53 +315,392 @@ class SRRLaser(_Laser):
         if calibrate:  # pragma: no cover, covered in laser
             if isotope is None:  # Perform calibration on all data
                 for name in data.dtype.names:
-                    data[name] = self.calibration[name].calibrate(data[name])
-            else:
-                data = self.calibration[isotope].calibrate(data)
+                    self.calibration[name].calibrate(data[name], out=data[name])
+            else:  # Cached reconstructions are read-only
+                out = data if data.flags.writeable else None
+                data = self.calibration[isotope].calibrate(data, out=out)
 
-        if flat and data.ndim > 2:
-            if isotope is not None:
-                data = np.mean(data, axis=2)
-            else:
-                structured = np.empty(data.shape[:2], data.dtype)
-                for name in data.dtype.names:
-                    structured[name] = np.mean(data[name], axis=2)
-                data = structured
+        if not data.flags.writeable:  # Never return the cached array
+            data = data.copy()
 
         return data
 
     def check_config_valid(self, config: SRRConfig) -> bool:
         """Checks if SRRConfig is valid for data."""
-        return config.valid_for_data(self.data)
+        return config.valid_for_data(self._layers_of(self.isotopes[0]))
 
-    def krisskross(self) -> np.ndarray:
-        """Perform SRR."""
+    def _krisskross_layout(
+        self, config: SRRConfig = None
+    ) -> Tuple[Tuple[int, int], List[Tuple[int, int]], List[int]]:
+        """Line lengths, per layer repeats and offsets of the reconstruction.
+
+        Args:
+            config: use instead of the laser config
+
+        Returns:
+            lengths of even and odd layers after trimming the warmup
+            repeats (r0, r1) of each (transposed) layer
+            subpixel offset of each layer
+        """
+        if config is None:
+            config = self.config
         # Calculate the line lengths
-        mag = self.config.magnification
+        mag = config.magnification
         mag = np.round(1.0 / mag if mag < 1.0 else mag).astype(int)
-        mag_axis = 0 if self.config.magnification > 1.0 else 1
-
-        length = (
-            self.data[1].shape[mag_axis] * mag,
-            self.data[0].shape[mag_axis] * mag,
+        mag_axis = 0 if config.magnification > 1.0 else 1
+
+        even, odd = self._channels[self.isotopes[0]]
+        length = (odd.shape[1 + mag_axis] * mag, even.shape[1 + mag_axis] * mag)
+
+        pixelsize = config.subpixels_per_pixel
+        offsets = list(config._subpixel_offsets)
+        # Offset for first layer must be zero
+        if offsets[0] != 0:
+            offsets.insert(0, 0)  # pragma: no cover
+
+        repeats, layer_offsets = [], []
+        for i in range(self.layers):
+            repeat = [pixelsize, pixelsize]
+            repeat[mag_axis] *= mag
+            # Vertical layers are flipped
+            repeats.append((repeat[1], repeat[0]) if i % 2 == 1 else tuple(repeat))
+            layer_offsets.append(offsets[i % len(offsets)])
+
+        return length, repeats, layer_offsets
+
+    def _krisskross_shape(self, config: SRRConfig = None) -> Tuple[int, int, int]:
+        if config is None:
+            config = self.config
+        length = self._krisskross_layout(config)[0]
+        pixelsize = config.subpixels_per_pixel
+        overlap = max(0, np.max(config._subpixel_offsets))
+        return (
+            length[1] * pixelsize + overlap,
+            length[0] * pixelsize + overlap,
+            self.layers,
         )
-        # Reshape the layers and stack into matrix
-        aligned = np.empty(
-            (length[1], length[0], self.layers), dtype=self.data[0].dtype
-        )
-        for i, layer in enumerate(self.data):
+
+    def _krisskross_into(
+        self,
+        out: np.ndarray,
+        isotope: str = None,
+        flat: bool = False,
+        max_workers: int = 1,
+    ) -> None:
+        """Reconstruct into a zero filled, layer-major array.
+
+        `out` has shape (layers, height, width), the transpose (2, 0, 1) of the
+        reconstruction. Each layer is trimmed, transposed if vertical and written
+        into its offset region of `out` as repeated blocks, without any temporary
+        arrays. If `isotope` is None then whole structured layers are used.
+        If `flat` then `out` is 2d and the layers are summed into it.
+
+        Unless `flat`, each layer writes to a disjoint slice of `out` and layers are
+        spread across `max_workers` threads.
+        """
+        length, repeats, offsets = self._krisskross_layout()
+        warmup = self.config._warmup
+
+        def write_layer(i: int) -> None:
+            if isotope is not None:
+                layer = self._layer(i, isotope)
+            else:
+                layer = self._structured_layer(i)
             # Trim data of warmup time and excess
-            layer = layer[:, self.config._warmup : self.config._warmup + length[i % 2]]
-            # Stretch array
-            layer = np.repeat(layer, mag, axis=mag_axis)
-            # Flip vertical layers
+            x = layer[:, warmup : warmup + length[i % 2]]
             if i % 2 == 1:
-                layer = layer.T
-            aligned[:, :, i] = layer
+                x = x.T
+            r0, r1 = repeats[i]
+            o = offsets[i]
+            if flat:
+                region = out[o : o + x.shape[0] * r0, o : o + x.shape[1] * r1]
+            else:
+                region = out[i, o : o + x.shape[0] * r0, o : o + x.shape[1] * r1]
+            repeat_into(region, x, (r0, r1), add=flat)
 
-        return subpixel_offset_equal(
-            aligned, self.config._subpixel_offsets, self.config.subpixels_per_pixel
-        )
+        if flat or max_workers == 1:
+            for i in range(self.layers):
+                write_layer(i)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(write_layer, range(self.layers)))
+
+    def krisskross(self, isotope: str = None, max_workers: int = 1) -> np.ndarray:
+        """Perform SRR.
+
+        The reconstruction is stored layer-major, the returned array is a
+        (height, width, layers) view of it. If `isotope` is given then only that
+        element is reconstructed and an unstructured array is returned.
+        Layers are written in parallel if `max_workers` is not 1.
+
+        Args:
+            isotope: element name, optional
+            max_workers: number of threads, None for the default
+
+        See Also:
+            :meth:`pewlib.srr.SRRLaser.iter_krisskross`
+        """
+        if isotope is not None:
+            return self._krisskross_isotope(
+                isotope, cache=False, max_workers=max_workers
+            )
+
+        h, w, layers = self._krisskross_shape()
+        data = np.zeros((layers, h, w), dtype=self._dtype)
+        self._krisskross_into(data, max_workers=max_workers)
+        return data.transpose(1, 2, 0)
+
+    def krisskross_flat(self, isotope: str = None, max_workers: int = 1) -> np.ndarray:
+        """Perform SRR and flatten, the mean of all layers.
+
+        Layers are summed directly into a 2d array, the 3d volume is never created.
+        Equivalent to `np.mean(self.krisskross(isotope), axis=2)`.
+        If `isotope` is None then elements are flattened in parallel if
+        `max_workers` is not 1.
+
+        Args:
+            isotope: element name, optional
+            max_workers: number of threads, None for the default
+
+        Returns:
+            structured if isotope is None else unstructured
+        """
+        h, w, layers = self._krisskross_shape()
+        if isotope is not None:
+            data = np.zeros((h, w), dtype=np.float64)
+            self._krisskross_into(data, isotope, flat=True)
+            data /= layers
+            return data
+
+        data = np.empty((h, w), dtype=self._dtype)
+
+        def flatten(name: str) -> None:
+            data[name] = self.krisskross_flat(name)
+
+        if max_workers == 1:
+            for name in self.isotopes:
+                flatten(name)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(flatten, self.isotopes))
+        return data
+
+    def iter_krisskross(
+        self, isotopes: List[str] = None, max_workers: int = 1
+    ) -> Generator[Tuple[str, np.ndarray], None, None]:
+        """Perform SRR one element at a time.
+
+        Only a single unstructured volume is allocated per iteration, results are
+        not cached.
+
+        Args:
+            isotopes: element names, default all
+            max_workers: number of threads used per element, None for the default
+
+        Yields:
+            element name and unstructured (height, width, layers) array
+        """
+        if isotopes is None:
+            isotopes = self.isotopes
+        for isotope in isotopes:
+            yield isotope, self._krisskross_isotope(
+                isotope, cache=False, max_workers=max_workers
+            )
+
+    def _krisskross_isotope(
+        self, isotope: str, cache: bool = True, max_workers: int = 1
+    ) -> np.ndarray:
+        """Perform SRR for a single isotope, as a float array.
+
+        If `cache` then results are cached and returned read-only, otherwise a
+        previously cached result is copied or a new array reconstructed.
+        """
+        self._validate_cache()
+        if isotope in self._cache:
+            data = self._cache[isotope]
+            return data if cache else data.copy()
+
+        h, w, layers = self._krisskross_shape()
+        data = np.zeros((layers, h, w), dtype=np.float64)
+        self._krisskross_into(data, isotope, max_workers=max_workers)
+        data = data.transpose(1, 2, 0)
+        if cache:
+            data.flags.writeable = False
+            self._cache[isotope] = data
+        return data
+
+    def _krisskross_flat_isotope(self, isotope: str) -> np.ndarray:
+        """Flattened SRR for a single isotope, cached and returned read-only.
+
+        If the 3d reconstruction of `isotope` is cached then its mean is used.
+        """
+        self._validate_cache()
+        if isotope not in self._flat_cache:
+            if isotope in self._cache:
+                data = np.mean(self._cache[isotope], axis=2)
+            else:
+                data = self.krisskross_flat(isotope)
+            data.flags.writeable = False
+            self._flat_cache[isotope] = data
+        return self._flat_cache[isotope]
+
+    def score_config(self, config: SRRConfig, isotope: str = None) -> float:
+        """Score how well the layers align for a config.
+
+        Each pair of adjacent layers is trimmed, upsampled and offset as in
+        :meth:`pewlib.srr.SRRLaser.krisskross` and the Pearson correlation of their
+        overlapping region calculated. If `isotope` is None then the element with
+        the largest mean in the first layer is used.
+
+        Args:
+            config: candidate config
+            isotope: element used for scoring
+
+        Returns:
+            mean correlation of adjacent layers, NaN if config is invalid
+
+        See Also:
+            :meth:`pewlib.srr.SRRLaser.score_configs`
+        """
+        return float(self.score_configs([config], isotope=isotope)[0])
+
+    def score_configs(
+        self, configs: List[SRRConfig], isotope: str = None, max_workers: int = 1
+    ) -> np.ndarray:
+        """Score how well the layers align for many configs.
+
+        As :meth:`pewlib.srr.SRRLaser.score_config`, but the upsampled layers are
+        never created. Upsampled layers are constant within blocks, so the sums of
+        their overlapping region are calculated from the trimmed layers and the
+        number of subpixels each pair of lines and samples share. Configs that only
+        differ in warmup share these counts and are scored together, as batches of
+        matrix products.
+
+        Args:
+            configs: candidate configs
+            isotope: element used for scoring
+            max_workers: number of threads used across batches, None for the default
+
+        Returns:
+            mean correlation of adjacent layers of each config, NaN if invalid
+
+        See Also:
+            :meth:`pewlib.srr.SRRLaser.search_config`
+        """
+        if isotope is None:
+            isotope = max(self.isotopes, key=lambda name: np.mean(self._layer(0, name)))
+
+        # Group valid configs by layout, these differ only in warmup
+        groups: Dict[tuple, List[int]] = {}
+        for i, config in enumerate(configs):
+            if self.check_config_valid(config):
+                length, repeats, offsets = self._krisskross_layout(config)
+                key = (tuple(length), tuple(repeats), tuple(offsets))
+                groups.setdefault(key, []).append(i)
+
+        scores = np.full(len(configs), np.nan, dtype=np.float64)
+
+        def score_group(key: tuple) -> None:
+            indices = groups[key]
+            warmups = [configs[i]._warmup for i in indices]
+            scores[indices] = self._score_warmups(isotope, *key, warmups)
+
+        if max_workers == 1:
+            for key in groups:
+                score_group(key)
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(score_group, groups))
+        return scores
+
+    def _score_warmups(
+        self,
+        isotope: str,
+        length: Tuple[int, int],
+        repeats: List[Tuple[int, int]],
+        offsets: List[int],
+        warmups: List[int],
+    ) -> np.ndarray:
+        """Mean correlation of adjacent layers for each warmup of a layout."""
+
+        def trimmed(i: int) -> np.ndarray:
+            """Stack of the layer trimmed for each warmup, centred."""
+            windows = np.lib.stride_tricks.sliding_window_view(
+                self._layer(i, isotope), length[i % 2], axis=1
+            )
+            x = np.moveaxis(windows[:, warmups], 1, 0).astype(np.float64)
+            if i % 2 == 1:
+                x = x.transpose(0, 2, 1)
+            return x - x.mean(axis=(1, 2), keepdims=True)
+
+        def counts(axis: int, i: int, j: int, na: int, nb: int) -> np.ndarray:
+            """Number of subpixels shared by each block of layers i and j."""
+            ra, rb = repeats[i][axis], repeats[j][axis]
+            oa, ob = offsets[i], offsets[j]
+            idx = np.arange(max(oa, ob), min(oa + na * ra, ob + nb * rb))
+            ia, ib = (idx - oa) // ra, (idx - ob) // rb
+            return np.bincount(ia * nb + ib, minlength=na * nb).reshape(na, nb)
+
+        pair_scores = []
+        a = trimmed(0)
+        for i in range(1, self.layers):
+            b = trimmed(i)
+            cy = counts(0, i - 1, i, a.shape[1], b.shape[1]).astype(np.float64)
+            cx = counts(1, i - 1, i, a.shape[2], b.shape[2]).astype(np.float64)
+            n = cy.sum() * cx.sum()
+
+            sab = np.sum(a * (cy @ b @ cx.T), axis=(1, 2))
+            ya, xa, yb, xb = cy.sum(1), cx.sum(1), cy.sum(0), cx.sum(0)
+            sa = np.einsum("i,wij,j->w", ya, a, xa)
+            saa = np.einsum("i,wij,j->w", ya, a * a, xa)
+            sb = np.einsum("i,wij,j->w", yb, b, xb)
+            sbb = np.einsum("i,wij,j->w", yb, b * b, xb)
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cov = sab / n - (sa / n) * (sb / n)
+                var = (saa / n - (sa / n) ** 2) * (sbb / n - (sb / n) ** 2)
+                pair_scores.append(np.where(var > 0.0, cov / np.sqrt(var), np.nan))
+            a = b
+
+        pair_scores = np.array(pair_scores)
+        valid = np.any(~np.isnan(pair_scores), axis=0)
+        with np.errstate(invalid="ignore"):
+            mean = np.nansum(pair_scores, axis=0) / np.sum(~np.isnan(pair_scores), 0)
+        return np.where(valid, mean, np.nan)
+
+    def search_config(
+        self, configs: List[SRRConfig], isotope: str = None, max_workers: int = 1
+    ) -> Tuple[SRRConfig, np.ndarray]:
+        """Find the best of many candidate configs.
+
+        Candidates (e.g. differing warmup, subpixel offsets or magnification) are
+        scored using :meth:`pewlib.srr.SRRLaser.score_configs`, no reconstruction
+        is performed. Invalid configs score NaN.
+
+        Args:
+            configs: candidate configs
+            isotope: element used for scoring
+            max_workers: number of threads, None for the default
+
+        Returns:
+            highest scoring config
+            score of each config
+
+        Raises:
+            ValueError if no config is valid
+
+        Example
+        -------
+
+        >>> warmups = np.arange(0.0, 20.0, 0.25)
+        >>> configs = [SRRConfig(35, 140, 0.25, warmup) for warmup in warmups]
+        >>> best, scores = laser.search_config(configs)
+        >>> laser.config = best
+        """
+        scores = self.score_configs(configs, isotope=isotope, max_workers=max_workers)
+        if np.all(np.isnan(scores)):
+            raise ValueError("No valid configs for data.")
+        return configs[int(np.nanargmax(scores))], scores
 
     @classmethod
     def from_list(
@@ -234,17 +712,16 @@ class SRRLaser(_Laser):
         path: Path = None,
     ) -> "SRRLaser":
         """Creates class from a list of names and lists of unstructured arrays."""
-        dtype = [(isotope, float) for isotope in isotopes]
-
-        structured_layers = []
         for datas in layers:
             assert len(isotopes) == len(datas)
-            structured = np.empty(datas[0].shape, dtype=dtype)
-            for isotope, data in zip(isotopes, datas):
-                structured[isotope] = data
-            structured_layers.append(structured)
-
-        return cls(data=structured_layers, config=config, name=name, path=path)
+        channels = {
+            isotope: (
+                np.array([datas[i] for datas in layers[0::2]], dtype=float),
+                np.array([datas[i] for datas in layers[1::2]], dtype=float),
+            )
+            for i, isotope in enumerate(isotopes)
+        }
+        return cls(data=channels, config=config, name=name, path=path)
 
     @classmethod
     def from_lasers(cls, lasers: List[Laser]) -> "SRRLaser":
@@ -258,7 +735,14 @@ class SRRLaser(_Laser):
             lasers[0].config.spotsize, lasers[0].config.speed, lasers[0].config.scantime
         )
         calibration = lasers[0].calibration
-        data = [laser.data for laser in lasers]
+        # Each field is copied once, directly into its stack
+        data = {
+            name: (
+                np.stack([laser.data[name] for laser in lasers[0::2]]),
+                np.stack([laser.data[name] for laser in lasers[1::2]]),
+            )
+            for name in lasers[0].isotopes
+        }
 
         return cls(
             data=data,
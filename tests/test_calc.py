@@ -24,6 +24,32 @@ def test_reset_cumsum():
     )
 
 
+def test_repeat_into():
+    x = np.random.random((5, 6))
+    out = np.zeros((10, 18, 2))
+    calc.repeat_into(out[:, :, 1], x, (2, 3))
+    assert np.all(out[:, :, 0] == 0.0)
+    assert np.all(out[:, :, 1] == np.repeat(np.repeat(x, 2, axis=0), 3, axis=1))
+    calc.repeat_into(out[:, :, 1], x, (2, 3), add=True)
+    assert np.all(out[:, :, 1] == np.repeat(np.repeat(2 * x, 2, axis=0), 3, axis=1))
+
+
+def test_view_as_blocks():
+    x = np.arange(48.0).reshape(6, 8)
+    data = np.empty((6, 8), dtype=[("a", float), ("b", float)])
+    data["a"] = x
+
+    # Non-contiguous, not copied
+    blocks = calc.view_as_blocks(data["a"], (2, 4))
+    assert np.shares_memory(blocks, data)
+    assert np.all(blocks == calc.view_as_blocks(x, (2, 4)))
+    assert np.all(blocks[1, 1] == x[2:4, 4:8])
+
+    windows = calc.view_as_blocks(data["a"][:, ::2], (3, 3), (1, 1))
+    assert windows.shape == (4, 2, 3, 3)
+    assert np.all(windows[2, 1] == x[2:5, 2:8:2])
+
+
 def test_shuffle_blocks():
     x = np.random.random((100, 100))
     m = np.zeros((100, 100))
@@ -36,6 +62,58 @@ def test_shuffle_blocks():
     assert np.allclose(y.sum(), x.sum())
 
 
+def test_gather_blocks():
+    x = np.random.random((7, 9))
+    blocks = calc.gather_blocks(x, (2, 3), mode="inplace")
+    assert blocks.shape == (3, 3, 2, 3)
+    assert np.all(blocks[1, 2] == x[2:4, 6:9])
+    assert np.all(calc.scatter_blocks(blocks, 2) == x[:6])
+
+    blocks = calc.gather_blocks(x, (2, 3), mode="pad")
+    assert blocks.shape == (4, 3, 2, 3)
+    assert np.all(blocks[3, 0] == x[6, 0:3])  # edge padded
+    assert np.all(calc.scatter_blocks(blocks[None], 2)[0, :7] == x)
+
+
+def test_shuffle_blocks_batch():
+    x = np.random.random((100, 100))
+    m = np.zeros((100, 100))
+    m[:52] = 1.0
+
+    y = calc.shuffle_blocks_batch(
+        x, (5, 20), 10, mask=m, rng=np.random.default_rng(12), images=True
+    )
+    assert y.shape == (10, 100, 100)
+    assert np.allclose(y[:, 50:], x[50:])
+    assert np.allclose(y.sum(axis=(1, 2)), x.sum())
+    assert not np.allclose(y[0], y[1])
+
+    # Reproducible
+    z = calc.shuffle_blocks_batch(
+        x, (5, 20), 10, mask=m, rng=np.random.default_rng(12), images=True
+    )
+    assert np.all(y == z)
+
+    # Gathered blocks and permutations
+    blocks, perms = calc.shuffle_blocks_batch(
+        x, (5, 20), 10, mask=m, rng=np.random.default_rng(12)
+    )
+    assert blocks.shape == (20, 5, 5, 20)
+    assert perms.shape == (10, 100)
+    assert np.all(np.sort(perms, axis=1) == np.arange(100))
+    assert np.all(perms[:, 50:] == np.arange(50, 100))  # Unmasked blocks
+    shuffled = blocks.reshape(-1, 5, 20)[perms].reshape(10, *blocks.shape)
+    assert np.all(calc.scatter_blocks(shuffled, 2) == y)
+
+    # Padded blocks are cropped
+    y = calc.shuffle_blocks_batch(x[:98, :95], (5, 20), 3, images=True)
+    assert y.shape == (3, 98, 95)
+    assert np.all(np.isin(y, x[:98, :95]))  # Edge padding copies values of x
+
+    perms = calc.block_permutations(10, 5, rng=np.random.default_rng(12))
+    assert np.all(np.sort(perms, axis=1) == np.arange(10))
+
+
 def test_subpixel_offset():
     x = np.ones((10, 10, 3))
 
@@ -49,6 +127,9 @@ def test_subpixel_offset():
         calc.subpixel_offset(x, [(0, 0), (1, 1)], (2, 2))
         == calc.subpixel_offset_equal(x, [0, 1], 2)
     )
+    assert np.all(
+        calc.subpixel_offset(x, [(0, 0), (1, 1), (2, 3)], (2, 3), max_workers=2) == y
+    )
 
 
 def test_subpixel_offset_means():
@@ -2,6 +2,9 @@ import numpy as np
 import pytest
 
 from pewlib.calibration import weights_from_weighting, weighted_rsq, weighted_linreg
+from pewlib.calibration import weighted_linreg_batch, update_linreg_batch
+from pewlib.calibration import calibrate_stack
+from pewlib.calibration import fit_batch, irls_linreg_batch, theil_sen_batch
 from pewlib.calibration import Calibration
 
 
@@ -50,6 +53,32 @@ def test_weighted_linreg():
     assert weighted_linreg(x, y, x) == pytest.approx(
         (2.085714, -3.314286, 0.865097, 2.296996)
     )
+    # Two points
+    assert weighted_linreg(x[:2], np.array([1.0, 4.0])) == pytest.approx(
+        (3.0, -2.0, 1.0, 0.0)
+    )
+    # Equal x, same as polyfit
+    gradient, intercept, rsq, error = weighted_linreg(np.full(3, 2.0), x[:3])
+    assert (gradient, intercept, error) == pytest.approx((0.5, 1.0, 0.0))
+    assert np.isnan(rsq)
+    gradient, intercept, rsq, error = weighted_linreg(
+        np.full(3, 2.0), x[:3], np.array([1.0, 2.0, 5.0])
+    )
+    assert (gradient, intercept, error) == pytest.approx((0.625, 1.25, 0.0))
+    gradient, intercept, rsq, error = weighted_linreg(np.zeros(3), x[:3])
+    assert (gradient, intercept, error) == pytest.approx((0.0, 2.0, 0.0))
+
+    # Near perfect fits, same error as polyfit
+    np.random.seed(82346)
+    x = np.arange(1.0, 101.0)
+    for gradient, noise in [(1e6, 1e-3), (1e7, 1.0)]:
+        y = gradient * x + np.random.normal(0.0, noise, x.size)
+        w = 1.0 / (x ** 2)
+        _, stats = np.polynomial.polynomial.polyfit(x, y, 1, w=np.sqrt(w), full=True)
+        error = np.sqrt(stats[0][0] / (x.size - 2))
+        assert weighted_linreg(x, y, w)[3] == pytest.approx(error, rel=1e-6)
+        batch = weighted_linreg_batch(np.stack([x, y], axis=1)[None], w[None])
+        assert batch[3][0] == pytest.approx(error, rel=1e-6)
 
 
 def test_default_calibration():
@@ -106,6 +135,31 @@ def test_calibration_calibrate():
 
     assert np.all(calibration.weights == 1.0)
 
+    # In place
+    calibration = Calibration(1.0, 3.0)
+    expected = (data - 1.0) / 3.0
+    out = np.empty_like(data)
+    assert calibration.calibrate(data, out=out) is out
+    assert np.allclose(out, expected)
+    calibration.calibrate(data, out=data)
+    assert np.allclose(data, expected)
+    # Default into out
+    Calibration().calibrate(data, out=out)
+    assert np.all(out == data)
+
+
+def test_calibrate_stack():
+    data = np.random.random([3, 10, 10])
+    calibrations = [Calibration(), Calibration(2.0, 2.0), Calibration(-1.0, 0.5)]
+    expected = np.stack([c.calibrate(d) for c, d in zip(calibrations, data)])
+
+    assert np.allclose(calibrate_stack(data, calibrations), expected)
+    calibrate_stack(data, calibrations, out=data)
+    assert np.allclose(data, expected)
+
+    with pytest.raises(ValueError):
+        calibrate_stack(data, calibrations[:2])
+
 
 def test_calibration_from_points():
     calibration = Calibration.from_points([[0, 1], [1, 2], [1, 3], [2, 4]])
@@ -158,6 +212,27 @@ def test_calibration_from_points_weights():
         calibration = Calibration.from_points(points=points, weights=("w", [1.0]))
 
 
+def test_calibration_weights_cached():
+    points = np.vstack([[1.0, 2.0, 3.0, 4.0, 5.0], [2.0, 4.0, 6.0, 8.0, 10.0]]).T
+    calibration = Calibration(points=points, weights="1/x")
+    weights = calibration.weights
+    assert calibration.weights is weights
+    assert not weights.flags.writeable
+
+    # Y based weights
+    calibration.weighting = "y"
+    assert np.all(calibration.weights == points[:, 1])
+    calibration.weights = "1/(y^2)"
+    assert np.allclose(calibration.weights, 1.0 / points[:, 1] ** 2)
+
+    # Invalidated on set or update
+    calibration.points = points[:3]
+    assert calibration.weights.size == 3
+    calibration.points[0, 1] = 1.0
+    calibration.update_linreg()
+    assert calibration.weights[0] == 1.0
+
+
 def test_calibration_update_linreg():
     points = np.vstack([[1.0, 2.0, 3.0, 4.0, 5.0], [1.0, 2.0, 3.0, 4.0, 5.0]]).T
     calibration = Calibration.from_points(points, weights="1/x")
@@ -172,3 +247,157 @@ def test_calibration_update_linreg():
 def test_calibration_str():
     calibration = Calibration(1.0, 2.0, rsq=0.999)
     assert str(calibration) == "y = 2 · x - 1\nr² = 0.9990"
+
+
+def test_weighted_linreg_batch():
+    np.random.seed(82346)
+    points = np.random.random((10, 8, 2))
+    weights = np.random.random((10, 8))
+    points[1, 3, 0] = np.nan
+    points[2, 5:] = np.nan
+    points[3] = np.nan
+
+    gradient, intercept, rsq, error = weighted_linreg_batch(points, weights)
+    for i in [0, 1, 2, 4]:
+        valid = ~np.isnan(points[i]).any(axis=1)
+        x, y, w = points[i, valid, 0], points[i, valid, 1], weights[i, valid]
+        assert (gradient[i], intercept[i], rsq[i], error[i]) == pytest.approx(
+            weighted_linreg(x, y, w)
+        )
+    # All nan
+    assert (gradient[3], intercept[3]) == (1.0, 0.0)
+    assert np.isnan(rsq[3]) and np.isnan(error[3])
+
+    with pytest.raises(ValueError):
+        weighted_linreg_batch(points[0])
+    with pytest.raises(ValueError):
+        weighted_linreg_batch(points, weights[:, :2])
+
+
+def test_update_linreg_batch():
+    calibrations = [
+        Calibration(points=[[0, 1], [1, 2], [1, 3], [2, 4]]),
+        Calibration(points=[[1, 1], [2, 1], [3, 2], [4, 4], [5, 8]], weights="x"),
+        Calibration(points=[[1.0, np.nan], [2.0, np.nan]]),
+        Calibration(),
+    ]
+    update_linreg_batch(calibrations)
+    assert calibrations[0].gradient == pytest.approx(1.5)
+    assert calibrations[0].intercept == pytest.approx(1.0)
+    assert calibrations[0].rsq == pytest.approx(0.9000)
+    assert calibrations[1].gradient == pytest.approx(2.085714)
+    assert calibrations[1].intercept == pytest.approx(-3.314286)
+    assert calibrations[1].rsq == pytest.approx(0.865097)
+    assert calibrations[1].error == pytest.approx(2.296996)
+    for calibration in calibrations[2:]:
+        assert calibration.gradient == 1.0
+        assert calibration.intercept == 0.0
+        assert calibration.rsq is None
+        assert calibration.error is None
+
+
+def test_calibration_calibrate_with_uncertainty():
+    # Miller & Miller, Statistics and Chemometrics, Example 5.6.1
+    x = [0.0, 2.0, 4.0, 6.0, 8.0, 10.0, 12.0]
+    y = [2.1, 5.0, 9.0, 12.6, 17.3, 21.0, 24.7]
+    points = np.stack([x, y], axis=1)
+    calibration = Calibration.from_points(points)
+    data = np.array([[2.9, 13.5], [23.0, 13.5]])
+
+    conc, err = calibration.calibrate_with_uncertainty(data)
+    assert np.allclose(conc, calibration.calibrate(data))
+    assert np.allclose(err, [[0.26, 0.24], [0.26, 0.24]], atol=0.005)
+    conc, err = calibration.calibrate_with_uncertainty(data, replicates=4)
+    assert np.allclose(err, [[0.18, 0.14], [0.17, 0.14]], atol=0.01)
+
+    # Chunked output should be the same
+    out = np.empty((2, 2)), np.empty((2, 2))
+    calibration.calibrate_with_uncertainty(data, replicates=4, chunk_size=1, out=out)
+    assert np.allclose(out[0], conc)
+    assert np.allclose(out[1], err)
+
+    # Chunks yielded
+    chunks = list(
+        calibration.iter_calibrate_with_uncertainty(data, replicates=4, chunk_size=1)
+    )
+    assert [c[0] for c in chunks] == [slice(0, 1), slice(1, 2)]
+    assert np.allclose(np.concatenate([c[1] for c in chunks]), conc)
+    assert np.allclose(np.concatenate([c[2] for c in chunks]), err)
+
+    # Not enough points
+    conc, err = Calibration(1.0, 2.0).calibrate_with_uncertainty(data)
+    assert np.all(np.isnan(err))
+
+
+def test_theil_sen_batch():
+    x = np.arange(10.0)
+    points = np.stack([np.stack([x, 2.0 * x + 1.0], axis=1)] * 3)
+    points[0, 5, 1] = 100.0  # Outlier
+    points[1, 4:6] = np.nan
+    points[2, :] = 1.0  # Equal x, falls back to least squares
+
+    gradient, intercept, rsq, error = theil_sen_batch(points)
+    assert np.allclose(gradient[:2], 2.0)
+    assert np.allclose(intercept[:2], 1.0)
+    assert rsq[1] == pytest.approx(1.0)
+    assert error[1] == pytest.approx(0.0)
+    assert (gradient[2], intercept[2]) == pytest.approx((0.5, 0.5))
+
+
+def test_irls_linreg_batch():
+    np.random.seed(7236481)
+    x = np.tile(np.arange(10.0), (5, 1))
+    y = 3.0 * x + 2.0 + np.random.normal(scale=0.01, size=x.shape)
+    y[:, 7] += 50.0  # Outlier
+    points = np.stack((x, y), axis=2)
+
+    for loss in ["huber", "bisquare"]:
+        gradient, intercept, rsq, error = irls_linreg_batch(points, loss=loss)
+        assert np.allclose(gradient, 3.0, atol=0.05)
+        assert np.allclose(intercept, 2.0, atol=0.2)
+
+    # Least squares is dragged by outlier
+    gradient, intercept, rsq, error = fit_batch(points, fit="Linear")
+    assert not np.allclose(gradient, 3.0, atol=0.05)
+
+    # r² describes the returned line
+    x = np.arange(10.0)
+    y = x.copy()
+    y[7] += 30.0
+    points = np.stack((x, y), axis=1)[None]
+    linear = fit_batch(points, fit="Linear")
+    for fit in ["Theil-Sen", "Huber", "Bisquare"]:
+        gradient, intercept, rsq, error = fit_batch(points, fit=fit)
+        assert gradient[0] == pytest.approx(1.0)
+        rss = np.sum((y - (gradient[0] * x + intercept[0])) ** 2)
+        assert rsq[0] == pytest.approx(1.0 - rss / np.sum((y - y.mean()) ** 2))
+        assert rsq[0] < linear[2][0]
+
+    with pytest.raises(ValueError):
+        irls_linreg_batch(points, loss="invalid")
+    with pytest.raises(ValueError):
+        fit_batch(points, fit="invalid")
+
+
+def test_calibration_fit():
+    points = np.stack([np.arange(10.0), 2.0 * np.arange(10.0)], axis=1)
+    points[3, 1] = 50.0
+
+    with pytest.raises(ValueError):
+        Calibration(fit="invalid")
+
+    linear = Calibration.from_points(points)
+    assert linear.gradient != pytest.approx(2.0)
+    for fit in ["Theil-Sen", "Huber", "Bisquare"]:
+        calibration = Calibration.from_points(points, weights="x", fit=fit)
+        assert calibration.gradient == pytest.approx(2.0, abs=0.05)
+
+        calibration = Calibration.from_array(calibration.to_array())
+        assert calibration.fit == fit
+
+    calibrations = [Calibration(points=points, fit=f) for f in Calibration.KNOWN_FIT]
+    update_linreg_batch(calibrations)
+    for calibration in calibrations:
+        expected = Calibration.from_points(points, fit=calibration.fit)
+        assert calibration.gradient == pytest.approx(expected.gradient)
+        assert calibration.intercept == pytest.approx(expected.intercept)
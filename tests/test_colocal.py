@@ -1,6 +1,7 @@
 import numpy as np
 
-from pewlib.process import colocal
+from pewlib import Laser
+from pewlib.process import calc, colocal
 
 
 a = np.tile([[0.0, 1.0], [0.0, 1.0]], (10, 10))
@@ -28,6 +29,51 @@ def test_pearson_r_probability():
     assert r == 0.0
     assert 0.66 > p > 0.33
 
+    # Matches shuffling then testing each array
+    rng = np.random.default_rng(9872)
+    x = rng.random((20, 23))
+    y = x + rng.random((20, 23))
+    mask = rng.random((20, 23)) > 0.2
+    for partial in [False, True]:
+        rs = colocal._shuffled_pearsonr(
+            x[None], y, mask, (3, 3), partial, 10, rng=np.random.default_rng(1)
+        )
+        ys = calc.shuffle_blocks_batch(
+            y,
+            (3, 3),
+            10,
+            mask=mask,
+            mode="inplace",
+            shuffle_partial=partial,
+            rng=np.random.default_rng(1),
+            images=True,
+        )
+        assert np.allclose(rs[:, 0], [colocal.pearsonr(x[mask], s[mask]) for s in ys])
+
+
+def test_pearson_r_probability_matrix():
+    x = np.stack([a, b, c, d])
+    mask = np.ones(a.shape, dtype=bool)
+    mask[:4] = False
+    r, p = colocal.pearsonr_probability_matrix(
+        x, block=3, mask=mask, n=100, rng=np.random.default_rng(9182)
+    )
+    assert r.shape == p.shape == (4, 4)
+    for i in range(4):
+        for j in range(4):
+            assert np.isclose(r[i, j], colocal.pearsonr(x[i][mask], x[j][mask]))
+
+    # Reproducible
+    _, p2 = colocal.pearsonr_probability_matrix(
+        x, block=3, mask=mask, n=100, rng=np.random.default_rng(9182)
+    )
+    assert np.all(p == p2)
+    # Matches the single pair probability
+    _, p3 = colocal.pearsonr_probablity(
+        x[1], x[3], block=3, mask=mask, n=100, rng=np.random.default_rng(9182)
+    )
+    assert p[1, 3] == p3
+
 
 def test_manders():
     assert colocal.manders(a, b) == (0.5, 0.5)  # Tx, Ty as min
@@ -36,5 +82,32 @@ def test_manders():
     assert colocal.manders(a, c, 0, 0) == (0.0, 0.0)
 
 
+def test_colocalisation_matrix():
+    x = np.stack([a, b, c, d, e])
+    r, icq, m = colocal.colocalisation_matrix(x, chunk_size=100)
+    for i in range(5):
+        for j in range(5):
+            assert np.isclose(r[i, j], colocal.pearsonr(x[i], x[j]))
+            assert np.isclose(icq[i, j], colocal.li_icq(x[i], x[j]))
+            assert np.allclose((m[i, j], m[j, i]), colocal.manders(x[i], x[j]))
+
+    # Masked and thresholds
+    mask = np.random.default_rng(8734).random(a.shape) > 0.3
+    r, icq, m = colocal.colocalisation_matrix(x, mask=mask, thresholds=[0, 0, 0, 2, 2])
+    assert np.isclose(r[3, 4], colocal.pearsonr(x[3][mask], x[4][mask]))
+    assert np.isclose(icq[3, 4], colocal.li_icq(x[3][mask], x[4][mask]))
+    assert np.allclose(
+        (m[0, 3], m[3, 0]), colocal.manders(x[0][mask], x[3][mask], 0, 2)
+    )
+
+    # Laser
+    data = np.empty(a.shape, dtype=[("A", float), ("B", float), ("D", float)])
+    data["A"], data["B"], data["D"] = a, b, d
+    r, icq, m = colocal.colocalisation_matrix(Laser(data), isotopes=["D", "A"])
+    assert r.shape == (2, 2)
+    assert np.isclose(r[0, 1], colocal.pearsonr(d, a))
+    assert np.isclose(icq[0, 1], colocal.li_icq(d, a))
+
+
 def test_costes_threshold():
     assert np.allclose(colocal.costes_threshold(a, a), (0.0, 1.0, 0.0))
@@ -1,5 +1,7 @@
 import numpy as np
+import warnings
 
+from pewlib import Laser
 from pewlib.process import filters
 
 
@@ -28,6 +30,72 @@ def test_mean_filter_2d():
     assert np.all(np.logical_and(0.0 <= f, f <= 1.0))
 
 
+def test_mean_filter_window():
+    np.random.seed(93546376)
+    d = np.random.random((20, 30)) + 10.0
+    d[3::7, 4::9] += 5.0
+    d[np.random.random(d.shape) < 0.1] = np.nan
+
+    f = filters.rolling_mean(d, (3, 5), threshold=2.0)
+
+    # Compare to windowed values
+    windows = np.lib.stride_tricks.sliding_window_view(
+        np.pad(d, ((1, 1), (2, 2)), constant_values=np.nan), (3, 5)
+    ).reshape(20, 30, -1)
+    nocenter = windows.copy()
+    nocenter[:, :, 7] = np.nan
+    means = np.nanmean(windows, axis=2)
+    outliers = np.abs(d - means) > 2.0 * np.nanstd(nocenter, axis=2)
+    assert np.any(outliers)
+
+    excluded = np.lib.stride_tricks.sliding_window_view(
+        np.pad(outliers, ((1, 1), (2, 2))), (3, 5)
+    ).reshape(20, 30, -1)
+    windows[excluded] = np.nan
+    means = np.nanmean(windows, axis=2)
+
+    assert np.allclose(f[outliers], means[outliers])
+    assert np.allclose(f[~outliers], d[~outliers], equal_nan=True)
+
+
+def test_mean_filter_large_values():
+    # Large values must not cancel the precision of sums for nearby counts
+    def exact(d, block, threshold):
+        pads = [(b // 2, b // 2) for b in block]
+        windows = np.lib.stride_tricks.sliding_window_view(
+            np.pad(d, pads, constant_values=np.nan), block
+        ).reshape(*d.shape, -1)
+        nocenter = windows.copy()
+        nocenter[..., windows.shape[-1] // 2] = np.nan
+        means = np.nanmean(windows, axis=-1)
+        outliers = np.abs(d - means) > threshold * np.nanstd(nocenter, axis=-1)
+        excluded = np.lib.stride_tricks.sliding_window_view(
+            np.pad(outliers, pads), block
+        ).reshape(*d.shape, -1)
+        windows = np.where(excluded, np.nan, windows)
+        return np.where(outliers, np.nanmean(windows, axis=-1), d)
+
+    np.random.seed(93546376)
+    d = np.random.poisson(lam=2.0, size=(200, 200)).astype(float)
+    d[:, 80:120] = 1e7
+    f = filters.rolling_mean(d, (3, 5), threshold=3.0)
+    assert np.allclose(f, exact(d, (3, 5), 3.0))
+
+    y = np.concatenate([np.full(1000, 1e7), np.random.poisson(lam=1.0, size=1000)])
+    f = filters.rolling_mean(y, 5, threshold=3.0)
+    assert np.allclose(f, exact(y, (5,), 3.0))
+
+    windows = np.lib.stride_tricks.sliding_window_view(
+        np.pad(y, 2, constant_values=np.nan), 5
+    ).copy()
+    windows[:, 2] = np.nan
+    means = np.nanmean(windows, axis=1)
+    outliers = y > means + 3.0 * np.sqrt(np.maximum(means, 1.0))
+    f = filters.rolling_poisson(y, 5, threshold=3.0)
+    assert np.any(outliers[1002:])
+    assert np.allclose(f, np.where(outliers, means, y))
+
+
 def test_median_filter_1d():
     np.random.seed(93546376)
     y = np.sin(np.linspace(0, 10, 100))
@@ -51,3 +119,138 @@ def test_median_filter():
 
     f = filters.rolling_median(d, (5, 5), threshold=3.0)
     assert np.all(np.logical_and(0.0 <= f, f <= 1.0))
+
+
+def test_median_filter_window():
+    np.random.seed(93546376)
+    d = np.random.random((20, 30))
+    d[np.random.random(d.shape) < 0.2] = np.nan
+    d[:3, :3] = np.nan
+
+    windows = np.lib.stride_tricks.sliding_window_view(
+        np.pad(d, ((1, 1), (2, 2)), constant_values=np.nan), (3, 5)
+    )
+    with warnings.catch_warnings():  # All nan slices
+        warnings.simplefilter("ignore", RuntimeWarning)
+        medians = np.nanmedian(windows, axis=(2, 3))
+
+    # Small chunks
+    assert np.allclose(
+        filters._window_nanmedian(d, (3, 5), chunk_size=100), medians, equal_nan=True
+    )
+    assert np.isnan(filters._window_nanmedian(d, (3, 3))[0, 0])
+
+    f = filters.rolling_median(d, (3, 5), threshold=0.5)
+    outliers = np.logical_and(f != d, ~np.isnan(d))
+    assert np.any(outliers)
+    assert np.allclose(f[outliers], medians[outliers])
+
+
+def test_filter_tiled():
+    np.random.seed(93546376)
+    d = np.random.random((45, 37))
+    d[5::7, 3::5] += np.random.choice([-2, 2], size=(6, 7))
+
+    for filter in [filters.rolling_mean, filters.rolling_median]:
+        f = filter(d, (5, 3), threshold=2.0)
+        t = filters.filter_tiled(d, filter, (5, 3), tile_shape=(10, 8), threshold=2.0)
+        assert np.allclose(f, t)
+
+    # Single thread, in place
+    x = d.copy()
+    filters.filter_tiled(
+        x, filters.rolling_median, (3, 3), tile_shape=16, max_workers=1, out=x
+    )
+    assert np.allclose(x, filters.rolling_median(d, (3, 3)))
+
+
+def test_filter_channels_laser():
+    np.random.seed(93546376)
+    data = np.empty((30, 40), dtype=[("A", float), ("B", float)])
+    data["A"] = np.random.random((30, 40))
+    data["B"] = np.random.random((30, 40))
+    data["A"][::5, ::5] += 3.0
+    laser = Laser(data.copy())
+
+    filters.filter_channels(laser, filters.rolling_median, (5, 5), isotopes=["A"])
+    assert np.allclose(laser.data["A"], filters.rolling_median(data["A"], (5, 5)))
+    assert np.all(laser.data["B"] == data["B"])
+
+    filters.filter_channels(laser, filters.rolling_mean, (3, 3), tile_shape=(8, 8))
+    assert np.allclose(laser.data["B"], filters.rolling_mean(data["B"], (3, 3)))
+
+
+def test_filter_channels():
+    np.random.seed(93546376)
+    x = np.random.random((3, 30, 40))
+    x[1] *= 1e6  # Channels are shifted independently
+    x[:, ::5, ::5] *= 3.0
+    x[2, 10:20, 10:20] = np.nan
+
+    for filter in [filters.rolling_mean, filters.rolling_median]:
+        y = x.copy()
+        filters.filter_channels(y, filter, (5, 5), tile_shape=16, threshold=2.0)
+        for i in range(3):
+            assert np.allclose(
+                y[i], filter(x[i], (5, 5), threshold=2.0), equal_nan=True
+            )
+
+    data = np.empty((30, 40), dtype=[("A", float), ("B", float), ("C", float)])
+    for i, name in enumerate(data.dtype.names):
+        data[name] = x[i]
+    laser = Laser(data)
+    filters.filter_channels(laser, filters.rolling_median, (3, 3), isotopes=["C", "A"])
+    assert np.all(laser.data["B"] == x[1])
+    assert np.allclose(
+        laser.data["C"], filters.rolling_median(x[2], (3, 3)), equal_nan=True
+    )
+
+
+def test_hampel_filter():
+    np.random.seed(93546376)
+    d = np.random.random((20, 30))
+    d[5::7, 3::5] += 5.0
+    d[np.random.random(d.shape) < 0.1] = np.nan
+
+    f = filters.rolling_hampel(d, (3, 5), threshold=3.0)
+
+    windows = np.lib.stride_tricks.sliding_window_view(
+        np.pad(d, ((1, 1), (2, 2)), constant_values=np.nan), (3, 5)
+    )
+    medians = np.nanmedian(windows, axis=(2, 3))
+    mads = np.nanmedian(np.abs(windows - medians[:, :, None, None]), axis=(2, 3))
+    outliers = np.abs(d - medians) > 3.0 * 1.4826 * mads
+
+    assert np.all(outliers[5::7, 3::5][~np.isnan(d[5::7, 3::5])])
+    assert np.allclose(f[outliers], medians[outliers])
+    assert np.allclose(f[~outliers], d[~outliers], equal_nan=True)
+
+
+def test_poisson_filter():
+    np.random.seed(93546376)
+    d = np.random.poisson(lam=50.0, size=(30, 30)).astype(float)
+    d[10, 10] = 200.0
+
+    f = filters.rolling_poisson(d, (5, 5), threshold=5.0)
+    assert np.isclose(f[10, 10], np.mean(np.delete(d[8:13, 8:13].ravel(), 12)))
+    assert np.count_nonzero(f != d) == 1
+
+    # Sparse
+    d = np.random.poisson(lam=0.1, size=(30, 30)).astype(float)
+    d[10, 10] = 20.0
+    f = filters.rolling_poisson(d, (5, 5), threshold=5.0)
+    assert np.count_nonzero(f != d) == 1
+
+
+def test_despike_lines():
+    np.random.seed(93546376)
+    d = np.random.random((10, 50))
+    d[:, 25] += 10.0  # Spike in every line
+    d[5, :] += 10.0  # Constant line, not a spike
+
+    f = filters.despike_lines(d, 5, threshold=3.0)
+    assert np.all(f[:, 25] < 1.0 + 10.0 * (np.arange(10) == 5))
+    assert np.all(f[5] >= 10.0)
+
+    f = filters.despike_lines(d, 5, filter=filters.rolling_mean)
+    assert np.all(f[:, 25] < 11.0)
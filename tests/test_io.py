@@ -16,6 +16,8 @@ def test_io_perkinelmer():
     assert not io.perkinelmer.is_valid_directory(path)
 
     data, params = io.perkinelmer.load(path.joinpath("perkinelmer"), full=True)
+    assert data.dtype.names == ("A1", "B2")
+    assert data.shape == (3, 3)
     assert np.isclose(np.sum(data["A1"]), 12.0)
     assert np.isclose(np.sum(data["B2"]), 15.0)
 
@@ -37,13 +39,66 @@ def test_io_textimage():
     assert data.shape == (5, 5)
     assert np.sum(data) == 85.0
 
-    # Test saving
     temp = tempfile.NamedTemporaryFile()
+
+    # Delimiter changes after the start of the file
+    with open(temp.name, "w") as fp:
+        fp.write("\n".join([",".join(["1.5"] * 10)] * 500 + [";".join(["2"] * 10)] * 5))
+    data = io.textimage.load(temp.name)
+    assert data.shape == (505, 10)
+    assert np.sum(data) == 500 * 15.0 + 5 * 20.0
+
+    # Test saving
     data = np.random.random([10, 10])
     io.textimage.save(temp.name, data)
     assert np.all(data == io.textimage.load(temp.name))
+    io.textimage.save(temp.name, data, header="a\nb", precision=4)
+    assert np.allclose(data, io.textimage.load(temp.name), atol=1e-4)
+    with open(temp.name, "r") as fp:
+        assert fp.readline() == "#a\n"
+        assert fp.readline() == "#b\n"
+
+    # Same output as savetxt
+    values = np.array(
+        [0.0, -0.0, 1.0, -12.0, 0.1, 2.5, 1e-5, -1.5e-4, 123456.5, 1e15, 1e20]
+        + [1e-300, 5e-324, np.nan, np.inf, -np.inf, 0.125, 9.9999e-5, 2.0 ** 53]
+        # Ties at low precisions
+        + [0.5, 1.5, -2.5, 0.15, 0.25, 0.35, 1.25, 1234.5, 9.5, 99.5, 0.0625]
+        # Around the limits of exact float64 integers
+        + [1e15 + 1, 1.5e15, 1e16, 1e16 + 2, 9.999999999999999e16, 1e17, 1.2e17]
+        # Subnormals and the smallest normal
+        + [2.2250738585072014e-308, 1e-310, -4.9e-322, 1.5e-315]
+    )
+    data = np.concatenate(
+        [
+            values,
+            np.random.poisson(5.0, 159).astype(float),
+            np.round(np.random.random(100), 3),
+            np.random.random(100) * 10.0 ** np.random.randint(-20, 20, 100),
+        ]
+    ).reshape(-1, 20)
+    for precision in [1, 4, 6, 12, 15, 18]:
+        io.textimage.save(temp.name, data, header="a", precision=precision)
+        with open(temp.name, "r") as fp:
+            text = fp.read()
+        np.savetxt(
+            temp.name,
+            data,
+            delimiter=",",
+            comments="#",
+            header="a",
+            fmt=f"%.{precision}g",
+        )
+        with open(temp.name, "r") as fp:
+            assert text == fp.read()
     temp.close()
 
+    # Sniffing delimiters
+    assert io.textimage.sniff_delimiter("1;2\n3;4\n5;") == ";"
+    assert io.textimage.sniff_delimiter("# a,b\n1\t2\n3\t4\n") == "\t"
+    assert io.textimage.sniff_delimiter("1\n2\n") == ","
+    assert io.textimage.sniff_delimiter("1,2\n3;4\n") is None
+
 
 def test_io_vtk():
     path = Path(__file__).parent.joinpath("data", "vtk")
@@ -0,0 +1,60 @@
+import numpy as np
+from pathlib import Path
+
+from pewlib import io
+from pewlib.laser import _Laser
+
+
+data_path = Path(__file__).parent.joinpath("data")
+
+
+def test_io_registry_probe():
+    expected = {
+        data_path.joinpath("agilent", "7700", "test.b"): "agilent",
+        data_path.joinpath("csv", "nu"): "csv",
+        data_path.joinpath("npz", "test.npz"): "npz",
+        data_path.joinpath("perkinelmer", "perkinelmer"): "perkinelmer",
+        data_path.joinpath("textimage", "csv.csv"): "textimage",
+        data_path.joinpath("thermo", "icap_columns.csv"): "thermo",
+        data_path.joinpath("thermo", "icap_rows.csv"): "thermo",
+    }
+    for path, format in expected.items():
+        assert io.registry.probe(path).format == format
+
+    assert io.registry.probe(data_path.joinpath("vtk", "test.vti")) is None
+
+    # Cached results
+    probe = io.registry.probe(data_path.joinpath("csv", "nu"))
+    assert isinstance(probe.kwargs["option"], io.csv.NuOption)
+    probe = io.registry.probe(data_path.joinpath("thermo", "icap_rows.csv"))
+    assert probe.kwargs["sample_format"] == "rows"
+    probe = io.registry.probe(data_path.joinpath("textimage", "csv.csv"))
+    assert probe.kwargs["delimiter"] == ","
+    probe = io.registry.probe(data_path.joinpath("textimage", "delimiter.csv"))
+    assert "delimiter" not in probe.kwargs
+
+
+def test_io_registry_load():
+    data, params = io.registry.load(
+        data_path.joinpath("perkinelmer", "perkinelmer"), full=True
+    )
+    assert data.dtype.names == ("A1", "B2")
+    assert params["scantime"] == 0.2
+
+    data, params = io.registry.load(
+        data_path.joinpath("textimage", "delimiter.csv"), full=True
+    )
+    assert np.sum(data) == 85.0
+    assert params == {}
+
+
+def test_io_registry_load_many():
+    paths = [
+        data_path.joinpath("thermo", "icap_columns.csv"),
+        io.registry.probe(data_path.joinpath("npz", "test.npz")),
+        data_path.joinpath("vtk", "test.vti"),
+    ]
+    results = io.registry.load_many(paths)
+    assert results[0].dtype.names == ("31P", "153Eu", "182W")
+    assert isinstance(results[1], _Laser)
+    assert results[2] is None
@@ -16,6 +16,11 @@ def test_io_thermo_format():
     assert thermo.icap_csv_sample_format(path.joinpath("icap_rows.csv")) == "rows"
     assert thermo.icap_csv_sample_format(path_csv.joinpath("csv.csv")) == "unknown"
 
+    # Positional use_analog and full
+    data, params = thermo.load(path.joinpath("icap_rows.csv"), False, True)
+    assert np.isclose(np.sum(data["31P"]), sums["31P"])
+    assert "scantime" in params
+
 
 def test_io_thermo_columns():
     path = Path(__file__).parent.joinpath("data", "thermo")
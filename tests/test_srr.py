@@ -73,6 +73,16 @@ def test_srr_krisskross():
     assert np.all(kk["a"][1] == np.array([1.5, 3]))
 
 
+def test_srr_krisskross_isotope():
+    data = [rand_data(["A", "B"], (10, 10)) for _ in range(4)]
+    laser = SRRLaser(data, config=SRRConfig(1, 1, 1, warmup=0))
+
+    kk = laser.krisskross()
+    assert kk.shape == (21, 21, 4)
+    assert np.all(laser.get("A") == kk["A"])
+    assert np.allclose(laser.get("B", flat=True), np.mean(kk["B"], axis=2))
+
+
 def test_srr_krisskross_mag_factors():
     a = np.tile([[0, 1], [1, 0]], (5, 5))
     b = np.rot90(a, 2)
@@ -103,3 +113,182 @@ def test_srr_krisskross_mag_factors():
         config=config,
     )
     assert laser.get("a", flat=True).shape == (21, 21)
+
+
+def test_srr_krisskross_cache():
+    data = [rand_data(["A", "B"], (10, 10)) for _ in range(2)]
+    laser = SRRLaser(data, config=SRRConfig(1, 1, 1, warmup=0))
+
+    a = laser._krisskross_isotope("A")
+    assert laser._krisskross_isotope("A") is a
+    assert not a.flags.writeable
+    # Returned data is writeable copy
+    assert laser.get("A").flags.writeable
+    assert np.all(laser.get("A") == a)
+
+    # Config changes
+    extent = laser.extent
+    laser.config.spotsize = 2
+    assert laser._krisskross_isotope("A") is not a
+    assert laser.extent != extent
+
+    # Data changes
+    b = laser._krisskross_isotope("B")
+    laser.rename({"B": "C"})
+    assert laser._krisskross_isotope("C") is b
+    laser.add("B", np.ones((2, 10, 10)))
+    assert laser._krisskross_isotope("C") is b  # Other elements are kept
+    assert np.all(np.isin(laser.get("B"), [0.0, 1.0]))
+    laser.remove("C")
+    assert "C" not in laser._cache
+
+    laser.data = [layer.copy() for layer in laser.data]
+    assert len(laser._cache) == 0
+
+
+def test_srr_krisskross_flat_cache(monkeypatch):
+    data = [rand_data(["A", "B"], (10, 10)) for _ in range(3)]
+    laser = SRRLaser(data, config=SRRConfig(1, 1, 1, warmup=0))
+
+    a = laser.get("A", flat=True)
+    assert laser.get("A", flat=True).flags.writeable
+    b = laser._krisskross_isotope("B")  # Flattened from the cached volume
+
+    def rebuild(*args, **kwargs):  # pragma: no cover
+        raise AssertionError("Reconstruction was not cached.")
+
+    monkeypatch.setattr(laser, "_krisskross_into", rebuild)
+    assert np.all(laser.get("A", flat=True) == a)
+    assert np.allclose(laser.get("B", flat=True), np.mean(b, axis=2))
+    monkeypatch.undo()
+
+    # Invalidated with the volume cache
+    flat = laser._flat_cache["A"]
+    laser.rename({"A": "C"})
+    assert laser._krisskross_flat_isotope("C") is flat
+    laser.add("A", np.ones((3, 10, 10)))
+    assert np.all(laser.get("A", flat=True) == laser.krisskross_flat("A"))
+    laser.remove("C")
+    assert "C" not in laser._flat_cache
+    laser.config.spotsize = 2
+    laser._validate_cache()
+    assert len(laser._flat_cache) == 0
+
+
+def test_srr_iter_krisskross():
+    data = [rand_data(["A", "B", "C"], (10, 10)) for _ in range(3)]
+    laser = SRRLaser(data, config=SRRConfig(1, 1, 1, warmup=0))
+
+    kk = laser.krisskross()
+    a = laser.krisskross("A")
+    assert a.dtype.names is None
+    assert np.all(a == kk["A"])
+    assert len(laser._cache) == 0
+
+    names = [name for name, _ in laser.iter_krisskross()]
+    assert names == ["A", "B", "C"]
+    for name, x in laser.iter_krisskross(["C", "B"]):
+        assert x.shape == kk.shape
+        assert np.all(x == kk[name])
+
+
+def test_srr_krisskross_flat():
+    data = [rand_data(["A", "B"], (10, 20)) for _ in range(4)]
+    laser = SRRLaser(data, config=SRRConfig(10, 10, 0.5, warmup=0.5))
+
+    kk = laser.krisskross()
+    flat = laser.krisskross_flat()
+    assert flat.shape == kk.shape[:2]
+    for name in laser.isotopes:
+        assert np.allclose(flat[name], np.mean(kk[name], axis=2))
+        assert np.allclose(laser.get(name, flat=True), flat[name])
+
+
+def test_srr_krisskross_threaded():
+    data = [rand_data(["A", "B"], (10, 10)) for _ in range(5)]
+    laser = SRRLaser(data, config=SRRConfig(1, 1, 1, warmup=0))
+
+    kk = laser.krisskross()
+    assert np.all(laser.krisskross(max_workers=4) == kk)
+    assert np.all(laser.krisskross("A", max_workers=4) == kk["A"])
+    flat = laser.krisskross_flat()
+    assert np.all(laser.krisskross_flat(max_workers=4) == flat)
+
+
+def test_srr_search_config():
+    np.random.seed(9723)
+    truth = np.random.random((40, 40))
+    layers = []
+    # Magnification of 2, lines are twice the width of a pixel
+    for x in [truth.reshape(20, 2, 40).mean(1), truth.reshape(40, 20, 2).mean(2).T]:
+        data = np.zeros((20, 43), dtype=[("A", float), ("B", float)])
+        data["A"] = np.hstack((np.random.random((20, 3)), x))
+        layers.append(data)
+    laser = SRRLaser(layers, config=SRRConfig(2, 1, 1, warmup=0))
+
+    configs = [
+        SRRConfig(2, 1, 1, warmup=w, subpixel_offsets=[(0, 1)]) for w in range(6)
+    ]
+    best, scores = laser.search_config(configs)
+    assert best is configs[3]
+    assert scores[3] > 0.5 and np.all(scores[:3] < 0.2)
+    assert np.all(np.isnan(scores[4:]))  # invalid
+    assert np.isnan(laser.score_config(configs[0], "B"))  # no variance
+
+    _, threaded = laser.search_config(configs, "A", max_workers=2)
+    assert np.allclose(scores, threaded, equal_nan=True)
+
+    # Same as correlating the overlap of the reconstructed layers
+    configs = [
+        SRRConfig(2, 1, 1, warmup=w, subpixel_offsets=[(0, 3), (2, 3)])
+        for w in range(3)
+    ]
+    scores = laser.score_configs(configs + [SRRConfig(2, 1, 1, warmup=1)], "A")
+    for config, score in zip(configs, scores):
+        laser.config = config
+        data = laser.krisskross("A")
+        overlap = np.all(data != 0.0, axis=2)
+        r = np.corrcoef(data[overlap][:, 0], data[overlap][:, 1])[0, 1]
+        assert score == pytest.approx(r)
+        assert laser.score_config(config, "A") == pytest.approx(r)
+
+    with pytest.raises(ValueError):
+        laser.search_config(configs[4:])
+
+
+def test_srr_storage():
+    data = [rand_data(["A", "B"], (10, 20)) for _ in range(3)]
+    laser = SRRLaser(data, config=SRRConfig(1, 1, 1, warmup=0))
+    assert laser.layers == 3
+    assert laser.shape == (10, 10, 3)
+
+    # Data is stored as contiguous stacks per orientation
+    even, odd = laser._channels["A"]
+    assert even.shape == (2, 10, 20) and odd.shape == (1, 10, 20)
+    assert even.flags.c_contiguous and odd.flags.c_contiguous
+    assert all(np.all(x == y) for x, y in zip(laser.data, data))
+
+    # Structured layers are read-only
+    with pytest.raises(ValueError):
+        laser.data[0]["A"] = 0.0
+    with pytest.raises(ValueError):
+        laser.layer_data(1)["B"] = 0.0
+    assert np.all(laser.layer_data(1) == data[1])
+
+    # Layers are only created when indexed
+    assert len(laser.data) == 3
+    assert np.all(laser.data[-1] == data[2])
+    assert [x.shape for x in laser.data[::2]] == [(10, 20), (10, 20)]
+    with pytest.raises(IndexError):
+        laser.data[3]
+
+    laser.add("C", [x["A"] for x in data])
+    assert laser.data[2].dtype.names == ("A", "B", "C")
+    assert laser._channels["C"][0] is not laser._channels["A"][0]
+    laser.remove("A")
+    laser.rename({"C": "A"})
+    assert laser.isotopes == ("B", "A")
+    assert np.all(laser.get("A", layer=2) == data[2]["A"])
+
+    with pytest.raises(AssertionError):
+        laser.add("D", [x["A"] for x in data][:2])